@@ -1,22 +1,59 @@
 import asyncio
 import logging
 import os
-from aiogram import Bot, Dispatcher, F, types
+from aiogram import BaseMiddleware, Bot, Dispatcher, F, types
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.dispatcher.flags import get_flag
 from aiogram.filters import CommandStart
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 import django
-from asgiref.sync import sync_to_async
 
 # Django settings
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 django.setup()
 
-from core.models import Verification
+from core.verifications import VerificationRepository
 
-BOT_TOKEN = "8352691243:AAFQd2eqptfda92EKeVynsrtL0lRr5B_UmY"
+BOT_TOKEN = os.environ.get("BOT_TOKEN", "8352691243:AAFQd2eqptfda92EKeVynsrtL0lRr5B_UmY")
+# Lokal Bot API server yoki load test uchun fake API (manage.py bot_loadtest)
+BOT_API_URL = os.environ.get("BOT_API_URL")
+# bitta process ichida har bir handler bir vaqtda nechta update ni qayta ishlaydi
+HANDLER_CONCURRENCY = int(os.environ.get("BOT_HANDLER_CONCURRENCY", 20))
 
-bot = Bot(token=BOT_TOKEN)
+
+class ConcurrencyLimitMiddleware(BaseMiddleware):
+    """
+    Handlerning "concurrency" flagi bo'yicha bir vaqtdagi chaqiruvlarni cheklaydi.
+    Ortiqcha update lar navbatda kutadi - spike paytida database ga ulanishlar
+    soni handler limitlari yig'indisidan oshmaydi.
+    """
+
+    def __init__(self):
+        self._semaphores = {}
+
+    async def __call__(self, handler, event, data):
+        limit = get_flag(data, "concurrency")
+        if not limit:
+            return await handler(event, data)
+        key = data["handler"].callback
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = self._semaphores[key] = asyncio.Semaphore(limit)
+        async with semaphore:
+            return await handler(event, data)
+
+
+bot = Bot(
+    token=BOT_TOKEN,
+    session=AiohttpSession(api=TelegramAPIServer.from_base(BOT_API_URL)) if BOT_API_URL else None,
+)
 dp = Dispatcher()
+dp.message.middleware(ConcurrencyLimitMiddleware())
+
+# DB thread pool = ikkala handler limitining yig'indisi: har bir parallel update o'z ulanishini oladi
+verifications = VerificationRepository(max_workers=HANDLER_CONCURRENCY * 2)
+dp.shutdown.register(verifications.close)
 
 # Telefon yuborish uchun keyboard
 request_phone_kb = ReplyKeyboardMarkup(
@@ -26,36 +63,29 @@ request_phone_kb = ReplyKeyboardMarkup(
 )
 
 
-@dp.message(CommandStart())
+@dp.message(CommandStart(), flags={"concurrency": HANDLER_CONCURRENCY})
 async def start_cmd(message: types.Message):
     """
     /start <token> kelganda Verification tokenini tekshiradi
     """
     args = message.text.split()
     if len(args) == 2:
-        token = args[1]
-        try:
-            verification = await sync_to_async(Verification.objects.get)(token=token, is_used=False)
-
-            if not verification.is_valid():
-                await message.answer("⏰ Ushbu havola eskirgan yoki ishlatilgan.")
-                return
-
-            # chat_id saqlash
-            verification.chat_id = message.chat.id
-            await sync_to_async(verification.save)()
+        status = await verifications.attach_chat(args[1], message.chat.id)
 
+        if status == "invalid":
+            await message.answer("❌ Noto‘g‘ri havola.")
+        elif status == "expired":
+            await message.answer("⏰ Ushbu havola eskirgan yoki ishlatilgan.")
+        else:
             await message.answer(
                 "Assalomu alaykum! Iltimos, telefon raqamingizni yuboring.",
                 reply_markup=request_phone_kb
             )
-        except Verification.DoesNotExist:
-            await message.answer("❌ Noto‘g‘ri havola.")
     else:
         await message.answer("Botdan foydalanish uchun sayt orqali ro‘yxatdan o‘ting.")
 
 
-@dp.message(F.contact)
+@dp.message(F.contact, flags={"concurrency": HANDLER_CONCURRENCY})
 async def phone_handler(message: types.Message):
     """
     Foydalanuvchi telefonini yuborganda tekshiradi
@@ -67,9 +97,7 @@ async def phone_handler(message: types.Message):
     if not phone.startswith("+"):
         phone = "+" + phone
 
-    verification = await sync_to_async(
-        lambda: Verification.objects.filter(chat_id=chat_id, is_used=False).order_by("-created_at").first()
-    )()
+    verification = await verifications.pending_for_chat(chat_id)
 
     if not verification:
         await message.answer("❌ Siz uchun tasdiqlash so‘rovi topilmadi.")
@@ -0,0 +1,139 @@
+"""
+Botni webhook rejimida ishga tushirish (bot.py dagi long polling o'rniga).
+
+    BOT_WEBHOOK_URL=https://example.uz/bot/webhook BOT_WEBHOOK_SECRET=... \\
+        python bot_webhook.py --workers 4 --port 8080
+
+Har bir worker alohida process: aiohttp ilovasi bir xil portni SO_REUSEPORT
+bilan tinglaydi, kernel ulanishlarni workerlar orasida taqsimlaydi. Webhook
+Telegramga faqat master processda bir marta o'rnatiladi. SIGTERM/SIGINT da
+workerlar yangi ulanish qabul qilishni to'xtatadi, ishlanayotgan update larni
+--shutdown-timeout soniyagacha tugatadi, keyin bot sessiyasini yopadi.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+
+from aiohttp import web
+
+WEBHOOK_PATH = os.environ.get("BOT_WEBHOOK_PATH", "/webhook")
+WEBHOOK_URL = os.environ.get("BOT_WEBHOOK_URL")
+WEBHOOK_SECRET = os.environ.get("BOT_WEBHOOK_SECRET") or None
+WEBHOOK_MAX_CONNECTIONS = int(os.environ.get("BOT_WEBHOOK_MAX_CONNECTIONS", 40))
+
+logger = logging.getLogger("bot_webhook")
+
+
+class InflightTracker:
+    """Webhook requestlarini sanaydi, shutdown da ular tugashini kutadi."""
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.count = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        self.count += 1
+        self._idle.clear()
+        try:
+            return await handler(request)
+        finally:
+            self.count -= 1
+            if not self.count:
+                self._idle.set()
+
+    async def wait_idle(self, app):
+        # aiohttp on_shutdown ni in-flight requestlardan oldin chaqiradi - bot sessiyasi
+        # yopilishidan avval ishlanayotgan update lar tugashini shu yerda kutamiz
+        try:
+            await asyncio.wait_for(self._idle.wait(), self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning("%s ta update shutdown timeout gacha tugamadi", self.count)
+
+
+def create_app(shutdown_timeout):
+    from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+    from bot import bot, dp
+
+    tracker = InflightTracker(shutdown_timeout)
+    app = web.Application(middlewares=[tracker.middleware])
+    app.on_shutdown.append(tracker.wait_idle)
+    # handle_in_background=False: javob update ishlangandan keyin qaytadi, shuning uchun
+    # Telegram bir workerga yuboradigan parallel update lar soni max_connections bilan cheklanadi
+    SimpleRequestHandler(
+        dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET, handle_in_background=False
+    ).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+def serve(host, port, shutdown_timeout):
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s [worker {os.getpid()}] %(levelname)s %(message)s")
+    web.run_app(
+        create_app(shutdown_timeout),
+        host=host,
+        port=port,
+        reuse_port=True,
+        shutdown_timeout=shutdown_timeout,
+        print=None,
+    )
+
+
+async def set_webhook():
+    from bot import bot
+
+    try:
+        await bot.set_webhook(
+            WEBHOOK_URL,
+            secret_token=WEBHOOK_SECRET,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=["message"],
+        )
+    finally:
+        await bot.session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Telegram bot webhook server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shutdown-timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if WEBHOOK_URL:
+        asyncio.run(set_webhook())
+        logger.info("Webhook o'rnatildi: %s", WEBHOOK_URL)
+
+    # spawn: har bir worker o'z event loopi, bot sessiyasi va DB ulanishlari bilan boshlanadi
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=serve, args=(args.host, args.port, args.shutdown_timeout))
+        for _ in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    logger.info("%s ta worker %s:%s da ishga tushdi", len(workers), args.host, args.port)
+
+    def stop(signum, frame):
+        for worker in workers:
+            if worker.is_alive():
+                os.kill(worker.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    # Ctrl+C butun process guruhiga boradi - workerlar uni o'zi oladi, ikkinchi signal
+    # esa ularning graceful shutdownini buzadi
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+from core.suggest import suggest_index  # noqa: E402
+
+# typeahead indeksi birinchi so'rovni kutmasdan process ishga tushishi bilan fonda quriladi
+suggest_index.rebuild_in_background()
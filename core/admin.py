@@ -1,8 +1,11 @@
+import time
+
 from django.contrib import admin
 from .models import (
     Category, Product, ProductImage, ProductComment, ProductCommentImage,
-    Cart, CartItem, Order, OrderItem
+    Cart, CartItem, Order, OrderItem, CommentImageUpload, ThrottleStat
 )
+from .throttling import flush_rejections
 
 # ------------------ PRODUCT ------------------
 class ProductImageInline(admin.TabularInline):
@@ -23,7 +26,9 @@ class ProductCommentAdmin(admin.ModelAdmin):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ("title", "price", "discount_price", "slug", "count")
+    list_display = ("title", "category", "price", "discount_price", "slug", "count", "rating_avg", "rating_count")
+    list_filter = ("category",)
+    list_select_related = ("category",)
     search_fields = ("title", "description")
     inlines = [ProductImageInline]
 
@@ -37,6 +42,13 @@ class CategoryAdmin(admin.ModelAdmin):
 admin.site.register(ProductComment, ProductCommentAdmin)
 
 
+@admin.register(CommentImageUpload)
+class CommentImageUploadAdmin(admin.ModelAdmin):
+    list_display = ("id", "comment", "status", "attempts", "created_at", "updated_at")
+    list_filter = ("status",)
+    readonly_fields = ("result", "error", "attempts")
+
+
 class CartItemInline(admin.TabularInline):
     model = CartItem
     extra = 1
@@ -67,3 +79,22 @@ class OrderAdmin(admin.ModelAdmin):
     list_filter = ("status", "created_at")
     search_fields = ("user__phone_number", "id")
     inlines = [OrderItemInline]
+
+
+# ------------------ THROTTLING ------------------
+@admin.register(ThrottleStat)
+class ThrottleStatAdmin(admin.ModelAdmin):
+    list_display = ("scope", "period_start", "rejected", "updated_at")
+    list_filter = ("scope",)
+    date_hierarchy = "period_start"
+
+    def changelist_view(self, request, extra_context=None):
+        # cache dagi eng so'nggi hisoblagichlarni ko'rsatish uchun
+        flush_rejections(time.time())
+        return super().changelist_view(request, extra_context)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
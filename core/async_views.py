@@ -0,0 +1,79 @@
+"""
+ASGI ostida thread hop siz ishlaydigan hot read endpointlar (Django async ORM).
+DRF viewlari sinxron bo'lgani uchun bu yerda oddiy async Django viewlar;
+javob formati DRF serializerlari bilan bir xil.
+"""
+from django.http import Http404, JsonResponse
+
+from .models import Cart, Category, Product
+from .serializers import CartSerializer, CategorySerializer, ProductSerializer, ProductSummarySerializer
+from .views import cart_items_prefetch, product_comments_prefetch, product_images_prefetch
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def page_size(request):
+    try:
+        return min(max(int(request.GET.get("page_size", DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return DEFAULT_PAGE_SIZE
+
+
+def keyset_page(request, items, size, key):
+    """?after=<oxirgi key> - OFFSET siz keyingi sahifa."""
+    has_next = len(items) > size
+    items = items[:size]
+    next_url = None
+    if has_next:
+        params = request.GET.copy()
+        params["after"] = getattr(items[-1], key)
+        next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+    return items, next_url
+
+
+async def product_list(request):
+    size = page_size(request)
+    queryset = Product.objects.only(
+        "id", "category_id", "title", "slug", "price", "discount_price", "image", "image_variants",
+        "rating_avg", "rating_count",
+    ).order_by("title")
+    if request.GET.get("category_id", "").isdigit():
+        queryset = queryset.filter(category_id=request.GET["category_id"])
+    if request.GET.get("after"):
+        queryset = queryset.filter(title__gt=request.GET["after"])
+
+    products = [product async for product in queryset[:size + 1]]
+    products, next_url = keyset_page(request, products, size, "title")
+    data = ProductSummarySerializer(products, many=True, context={"request": request}).data
+    return JsonResponse({"next": next_url, "results": data})
+
+
+async def product_detail(request, pk):
+    try:
+        product = await Product.objects.prefetch_related(
+            product_images_prefetch(), product_comments_prefetch()
+        ).aget(pk=pk)
+    except Product.DoesNotExist:
+        raise Http404
+    return JsonResponse(ProductSerializer(product, context={"request": request}).data)
+
+
+async def category_list(request):
+    size = page_size(request)
+    queryset = Category.objects.order_by("title")
+    if request.GET.get("after"):
+        queryset = queryset.filter(title__gt=request.GET["after"])
+
+    categories = [category async for category in queryset[:size + 1]]
+    categories, next_url = keyset_page(request, categories, size, "title")
+    data = CategorySerializer(categories, many=True, context={"request": request}).data
+    return JsonResponse({"next": next_url, "results": data})
+
+
+async def cart_detail(request, pk):
+    try:
+        cart = await Cart.objects.with_totals().prefetch_related(cart_items_prefetch()).aget(pk=pk)
+    except Cart.DoesNotExist:
+        raise Http404
+    return JsonResponse(CartSerializer(cart, context={"request": request}).data)
@@ -0,0 +1,82 @@
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+USER_VERSION_KEY = "auth-user-version:{}"
+USER_KEY = "auth-user:{}:{}"
+
+# request.user uchun yetarli maydonlar; password va boshqalar deferred (kerak bo'lsa lazy yuklanadi)
+PRINCIPAL_FIELDS = ("id", "phone_number", "first_name", "last_name", "is_active", "is_staff", "is_superuser")
+
+
+@lru_cache
+def principal_fields():
+    # Model.from_db qiymatlarni concrete field tartibida kutadi
+    return tuple(
+        field.attname for field in get_user_model()._meta.concrete_fields if field.attname in PRINCIPAL_FIELDS
+    )
+
+
+def cache_ttl():
+    return getattr(settings, "AUTH_USER_CACHE_TTL", 60)
+
+
+# ------------------ USER VERSIONS ------------------
+def get_user_version(user_id):
+    key = USER_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        # versiya kaliti yo'qolsa yangisi olinadi - eski yozuvlar shunchaki o'qilmay qoladi
+        cache.add(key, time.time_ns(), timeout=cache_ttl() * 10)
+        version = cache.get(key)
+    return version
+
+
+def bump_user_version(user_id):
+    key = USER_VERSION_KEY.format(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=cache_ttl() * 10)
+
+
+# ------------------ AUTHENTICATION ------------------
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication, lekin token dagi user_id bo'yicha User har requestda
+    database dan olinmaydi: PRINCIPAL_FIELDS qiymatlari cache da (user id +
+    user versiyasi kaliti bilan, AUTH_USER_CACHE_TTL soniya) saqlanadi.
+    User saqlanganda/o'chirilganda versiya oshadi (core.signals), shuning uchun
+    deaktivatsiya darhol kuchga kiradi. Qaytariladigan obyekt haqiqiy User
+    (FK larga berish mumkin), qolgan maydonlar deferred; save() faqat yuklangan
+    maydonlarni yozadi.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # password hash solishtirish uchun to'liq User kerak
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as exc:
+            raise InvalidToken("Token contained no recognizable user identification") from exc
+
+        # versiya DB dan o'qishdan OLDIN olinadi: shu orada user saqlansa, eskirgan
+        # qiymat eski versiya kaliti ostida qoladi va hech qachon o'qilmaydi
+        key = USER_KEY.format(user_id, get_user_version(user_id))
+        values = cache.get(key)
+        if values is not None:
+            user_model = get_user_model()
+            return user_model.from_db(user_model.objects.db, principal_fields(), values)
+
+        # topilmasa / aktiv bo'lmasa super() AuthenticationFailed beradi - bunday holat cache lanmaydi
+        user = super().get_user(validated_token)
+        cache.set(key, tuple(getattr(user, field) for field in principal_fields()), timeout=cache_ttl())
+        return user
@@ -0,0 +1,88 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .routers import use_primary
+
+VERSION_KEY = "catalog-version:{}"
+
+
+# ------------------ MODEL VERSIONS ------------------
+def _fresh_version():
+    # eviction dan keyin versiya 1 ga qaytib eski javoblarni "tiriltirmasligi" uchun
+    return time.time_ns()
+
+
+def get_versions(labels):
+    keys = [VERSION_KEY.format(label) for label in labels]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _fresh_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(label):
+    key = VERSION_KEY.format(label)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), timeout=None)
+
+
+# ------------------ RESPONSE CACHE ------------------
+class VersionedCacheMixin:
+    """
+    list/retrieve javoblarini cache ga saqlaydi. Kalit = path + normallashtirilgan
+    query params + cache_dependencies modellarining versiyalari; modelga yozilganda
+    versiya oshiriladi (core.signals), shuning uchun eski javob hech qachon qaytmaydi.
+    ETag ham shu kalitdan olinadi - If-None-Match mos kelsa 304 cache ga ham tegmaydi.
+    """
+    cache_dependencies = ()
+    cache_timeout = 60 * 60
+
+    def get_response_cache_key(self, request):
+        params = sorted((k, v) for k, values in request.query_params.lists() for v in values if v != "")
+        versions = get_versions(self.cache_dependencies)
+        raw = "|".join([
+            request.get_host(),
+            request.path,
+            urlencode(params),
+            request.accepted_renderer.format if getattr(request, "accepted_renderer", None) else "",
+            ",".join(str(v) for v in versions),
+        ])
+        return "catalog-response:" + hashlib.md5(raw.encode()).hexdigest()
+
+    def cached_response(self, request, build_response):
+        key = self.get_response_cache_key(request)
+        etag = quote_etag(key.rsplit(":", 1)[1])
+
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        data = cache.get(key)
+        if data is None:
+            # versiya commit dan keyin oshadi, replica esa hali orqada bo'lishi mumkin:
+            # replica dan o'qilgan eski javob yangi versiya kaliti ostida cache_timeout
+            # davomida qolib ketmasligi uchun cache faqat primary dan to'ldiriladi
+            with use_primary():
+                response = build_response()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cache.set(key, response.data, self.cache_timeout)
+        else:
+            response = Response(data)
+        response["ETag"] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(VersionedCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(VersionedCacheMixin, self).retrieve(request, *args, **kwargs))
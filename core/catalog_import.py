@@ -0,0 +1,420 @@
+import csv
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils.text import slugify
+from PIL import Image, UnidentifiedImageError
+
+from .cache import bump_version
+from .images import schedule_derivatives
+from .models import Category, Product, ProductImage
+from .search import get_search_backend
+from .signals import release_image
+from .storage import content_addressed_storage
+from .suggest import suggest_index
+
+IMPORT_FORMATS = ("csv", "jsonl")
+BATCH_SIZE = 1000
+# report da saqlanadigan xatolar soni (qolganlari faqat sanaladi)
+MAX_REPORTED_ERRORS = 100
+
+CENT = Decimal("0.01")
+# DecimalField(max_digits=10, decimal_places=2)
+MAX_PRICE = Decimal("99999999.99")
+
+# upsert da mavjud mahsulotning shu maydonlari yangilanadi (slug, rating, reserved_count - yo'q)
+UPDATE_FIELDS = ("category", "description", "price", "discount_price", "count", "image", "image_variants")
+EXISTING_FIELDS = ("id", "title", "slug", "category_id", "description", "discount_price", "count", "image", "image_variants")
+
+
+class CatalogImportError(Exception):
+    pass
+
+
+class RowError(Exception):
+    pass
+
+
+def images_root():
+    root = getattr(settings, "CATALOG_IMPORT_ROOT", None)
+    # MEDIA_ROOT Path emas, oddiy str bo'lishi ham mumkin
+    return Path(root) if root else Path(settings.MEDIA_ROOT) / "imports"
+
+
+# ------------------ PARSING ------------------
+def iter_csv(lines):
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or "title" not in reader.fieldnames:
+        raise CatalogImportError("CSV sarlavhasida `title` ustuni bo'lishi kerak.")
+    for data in reader:
+        yield reader.line_num, data
+
+
+def iter_jsonl(lines):
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield line_no, RowError(f"Yaroqsiz JSON: {exc}")
+            continue
+        yield line_no, data if isinstance(data, dict) else RowError("Har bir qator JSON obyekt bo'lishi kerak.")
+
+
+def iter_records(import_format, lines):
+    """(qator raqami, dict yoki RowError) juftliklari. `lines` - matn qatorlari (fayl obyekti)."""
+    if import_format not in IMPORT_FORMATS:
+        raise CatalogImportError(f"Format {', '.join(IMPORT_FORMATS)} dan biri bo'lishi kerak.")
+    if import_format == "csv":
+        return iter_csv(lines)
+    return iter_jsonl(lines)
+
+
+def _text(data, name, max_length=None):
+    value = data.get(name)
+    value = "" if value is None else str(value).strip()
+    if max_length and len(value) > max_length:
+        raise RowError(f"{name}: {max_length} belgidan uzun.")
+    return value
+
+
+def _decimal(value, name):
+    try:
+        value = Decimal(str(value).strip()).quantize(CENT)
+    except (InvalidOperation, ValueError):
+        raise RowError(f"{name}: son bo'lishi kerak.")
+    if not Decimal(0) <= value <= MAX_PRICE:
+        raise RowError(f"{name}: 0 dan {MAX_PRICE} gacha bo'lishi kerak.")
+    return value
+
+
+def clean_record(data):
+    """
+    Qator -> Product qiymatlari. Faylda yo'q maydon mavjud mahsulotda o'zgarmaydi;
+    bo'sh discount_price/category esa tozalanadi. image/images - CATALOG_IMPORT_ROOT
+    ga nisbatan yo'llar (images: CSV da "|" bilan, JSONL da ro'yxat).
+    """
+    if isinstance(data, RowError):
+        raise data
+    row = {"title": _text(data, "title", max_length=200)}
+    if not row["title"]:
+        raise RowError("title bo'sh.")
+    if _text(data, "price") == "":
+        raise RowError("price bo'sh.")
+    row["price"] = _decimal(data["price"], "price")
+
+    if "description" in data:
+        row["description"] = _text(data, "description")
+    if "category" in data:
+        row["category"] = _text(data, "category", max_length=150) or None
+    if "discount_price" in data:
+        discount = _text(data, "discount_price")
+        row["discount_price"] = _decimal(discount, "discount_price") if discount else None
+    if _text(data, "count") != "":
+        try:
+            row["count"] = int(_text(data, "count"))
+        except ValueError:
+            raise RowError("count: butun son bo'lishi kerak.")
+        if row["count"] < 0:
+            raise RowError("count: manfiy bo'lmasligi kerak.")
+    row["image"] = _text(data, "image")
+
+    images = data.get("images") or []
+    if isinstance(images, str):
+        images = images.split("|")
+    row["images"] = [str(path).strip() for path in images if str(path).strip()]
+    return row
+
+
+# ------------------ IMAGES ------------------
+class ImageSource:
+    """
+    Import fayllaridagi rasm yo'llari -> ContentAddressedStorage nomi. Har bir fayl
+    import davomida bir marta o'qiladi (hash + Pillow tekshiruvi), diskka esa
+    faqat havola olinganda (acquire) va u yerda bo'lmasa yoziladi.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or images_root()).resolve()
+        self.storage = content_addressed_storage()
+        self._names = {}
+        self._paths = {}
+
+    def name_for(self, path):
+        if path not in self._names:
+            self._names[path] = self._hash(path)
+        name, error = self._names[path]
+        if error:
+            raise RowError(error)
+        return name
+
+    def _hash(self, path):
+        source = (self.root / path).resolve()
+        if not source.is_relative_to(self.root) or not source.is_file():
+            return None, f"Rasm topilmadi: {path}"
+        try:
+            with Image.open(source) as image:
+                image.verify()
+        except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError):
+            return None, f"Yaroqsiz rasm: {path}"
+        with source.open("rb") as file:
+            name = self.storage.hashed_name(source.name, File(file, source.name))
+        self._paths[name] = source
+        return name, None
+
+    def acquire(self, references):
+        """{nom: havolalar soni} - har bir fayl uchun bitta StoredFile UPDATE."""
+        for name, count in references.items():
+            source = self._paths[name]
+            with source.open("rb") as file:
+                self.storage.acquire(name, count, content=File(file, source.name))
+
+
+# ------------------ IMPORT ------------------
+def unique_slug(base, taken, counters):
+    """Product.save() dagi base, base-1, base-2... ketma-ketligi, lekin database so'rovisiz."""
+    slug = base
+    if slug in taken:
+        counter = counters.get(base, 1)
+        while f"{base}-{counter}" in taken:
+            counter += 1
+        counters[base] = counter + 1
+        slug = f"{base}-{counter}"
+    taken.add(slug)
+    return slug
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.categories_created = 0
+        self.images_added = 0
+        self.failed = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    def add_error(self, line_no, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "categories_created": self.categories_created,
+            "images_added": self.images_added,
+            "elapsed": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "errors": self.errors,
+        }
+
+
+class CatalogImporter:
+    """
+    CSV/JSONL dan mahsulotlarni `batch_size` lik partiyalarda title bo'yicha upsert
+    qiladi (bulk_create + ON CONFLICT (title) DO UPDATE). Mavjud slug lar boshida
+    bitta so'rov bilan olinadi va yangi slug lar xotirada hisoblanadi, shuning
+    uchun Product.save() dagi har bir to'qnashuv uchun exists() so'rovi yo'q.
+
+    bulk yozuvlar signal yubormaydi, shuning uchun signal qiladigan ishlar shu
+    yerda bajariladi: qidiruv indeksi, rasm havolalari/derivativelar, response
+    cache versiyalari va suggest indeksi. Har bir partiya alohida tranzaksiya;
+    yaroqsiz qatorlar o'tkazib yuboriladi va reportga yoziladi.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, images_root=None, using="default"):
+        self.batch_size = batch_size
+        self.using = using
+        self.images = ImageSource(images_root)
+        self.search_backend = get_search_backend(using)
+        self.report = ImportReport()
+        self.touched = set()
+
+        self.categories = dict(Category.objects.using(using).values_list("title", "id"))
+        self.category_slugs = set(Category.objects.using(using).values_list("slug", flat=True))
+        self.product_slugs = set(
+            Product.objects.using(using).values_list("slug", flat=True).iterator(chunk_size=10000)
+        )
+        self.category_slug_counters = {}
+        self.product_slug_counters = {}
+
+    def run(self, records):
+        started = time.perf_counter()
+        try:
+            batch = {}
+            for line_no, data in records:
+                self.report.rows += 1
+                try:
+                    row = clean_record(data)
+                except RowError as exc:
+                    self.report.add_error(line_no, str(exc))
+                    continue
+                # bir faylda bir xil title takrorlansa oxirgisi olinadi
+                batch.pop(row["title"], None)
+                batch[row["title"]] = (line_no, row)
+                if len(batch) >= self.batch_size:
+                    self.import_batch(batch)
+                    batch = {}
+            if batch:
+                self.import_batch(batch)
+        finally:
+            self.finish()
+            self.report.elapsed = time.perf_counter() - started
+        return self.report
+
+    def finish(self):
+        for label in sorted(self.touched):
+            bump_version(label)
+        if self.touched:
+            suggest_index.invalidate()
+
+    def import_batch(self, batch):
+        rows = self.resolve_images(batch)
+        if not rows:
+            return
+        with transaction.atomic(using=self.using):
+            self.create_categories(rows)
+            titles = [row["title"] for row in rows]
+            existing = {
+                values["title"]: values
+                for values in Product.objects.using(self.using).filter(title__in=titles).values(*EXISTING_FIELDS)
+            }
+            products, image_references, replaced = self.build_products(rows, existing)
+
+            Product.objects.using(self.using).bulk_create(
+                products, update_conflicts=True, unique_fields=["title"], update_fields=list(UPDATE_FIELDS)
+            )
+            self.fill_missing_pks(products)
+            gallery = self.build_gallery(rows, products, image_references)
+
+            self.images.acquire(image_references)
+            if gallery:
+                ProductImage.objects.using(self.using).bulk_create(gallery)
+            if self.search_backend.needs_sync:
+                self.search_backend.index(products)
+
+            changed = [product for product, row in zip(products, rows) if row["image_changed"]]
+            transaction.on_commit(lambda: self.after_commit(changed, gallery, replaced), using=self.using)
+
+        self.report.created += sum(1 for row in rows if row["title"] not in existing)
+        self.report.updated += sum(1 for row in rows if row["title"] in existing)
+        self.report.images_added += len(gallery)
+        self.touched.add(Product._meta.label)
+        if gallery:
+            self.touched.add(ProductImage._meta.label)
+
+    def resolve_images(self, batch):
+        rows = []
+        for line_no, row in batch.values():
+            try:
+                row["image_name"] = self.images.name_for(row["image"]) if row["image"] else ""
+                row["image_names"] = [self.images.name_for(path) for path in row["images"]]
+            except RowError as exc:
+                self.report.add_error(line_no, str(exc))
+                continue
+            rows.append(row)
+        return rows
+
+    def create_categories(self, rows):
+        missing = {row["category"] for row in rows if row.get("category") and row["category"] not in self.categories}
+        if not missing:
+            return
+        Category.objects.using(self.using).bulk_create(
+            [
+                Category(title=title, slug=unique_slug(slugify(title), self.category_slugs, self.category_slug_counters))
+                for title in sorted(missing)
+            ],
+            ignore_conflicts=True,
+        )
+        # parallel import shu kategoriyani yaratgan bo'lishi mumkin - id lar qayta o'qiladi
+        self.categories.update(Category.objects.using(self.using).filter(title__in=missing).values_list("title", "id"))
+        self.report.categories_created += len(missing)
+        self.touched.add(Category._meta.label)
+
+    def build_products(self, rows, existing):
+        products = []
+        image_references = {}
+        replaced = []
+        for row in rows:
+            current = existing.get(row["title"])
+            if current is None:
+                current = {
+                    "slug": unique_slug(slugify(row["title"]), self.product_slugs, self.product_slug_counters),
+                    "category_id": None, "description": "", "discount_price": None, "count": 0,
+                    "image": "", "image_variants": {},
+                }
+            image, variants = current["image"] or "", current["image_variants"]
+            row["image_changed"] = bool(row["image_name"]) and row["image_name"] != image
+            if row["image_changed"]:
+                image_references[row["image_name"]] = image_references.get(row["image_name"], 0) + 1
+                if image:
+                    replaced.append((image, variants))
+                image, variants = row["image_name"], {}
+
+            category_id = current["category_id"]
+            if "category" in row:
+                category_id = self.categories[row["category"]] if row["category"] else None
+            products.append(Product(
+                title=row["title"],
+                slug=current["slug"],
+                category_id=category_id,
+                description=row.get("description", current["description"]),
+                price=row["price"],
+                discount_price=row.get("discount_price", current["discount_price"]),
+                count=row.get("count", current["count"]),
+                image=image,
+                image_variants=variants,
+            ))
+        return products, image_references, replaced
+
+    def fill_missing_pks(self, products):
+        # RETURNING bilan upsert qila olmaydigan backendlar uchun
+        missing = {product.title: product for product in products if product.pk is None}
+        if missing:
+            for pk, title in Product.objects.using(self.using).filter(title__in=missing).values_list("id", "title"):
+                missing[title].pk = pk
+
+    def build_gallery(self, rows, products, image_references):
+        """images dagi rasmlar galereyaga qo'shiladi; mahsulotda allaqachon bor rasm qayta qo'shilmaydi."""
+        product_ids = [product.pk for product, row in zip(products, rows) if row["image_names"]]
+        if not product_ids:
+            return []
+        attached = set(
+            ProductImage.objects.using(self.using).filter(product_id__in=product_ids).values_list("product_id", "image")
+        )
+        gallery = []
+        for product, row in zip(products, rows):
+            for name in row["image_names"]:
+                if (product.pk, name) in attached:
+                    continue
+                attached.add((product.pk, name))
+                image_references[name] = image_references.get(name, 0) + 1
+                gallery.append(ProductImage(product_id=product.pk, image=name))
+        return gallery
+
+    def after_commit(self, products, gallery, replaced):
+        for instance in [*products, *gallery]:
+            schedule_derivatives(instance)
+        for name, variants in replaced:
+            release_image(name, variants)
+
+
+def import_catalog(import_format, lines, batch_size=BATCH_SIZE, images_root=None, using="default"):
+    return CatalogImporter(batch_size=batch_size, images_root=images_root, using=using).run(
+        iter_records(import_format, lines)
+    )
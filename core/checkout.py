@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.db.models import F
+
+from .cache import bump_version
+from .models import Cart, Order, OrderItem, Product
+
+
+class CheckoutError(Exception):
+    pass
+
+
+def checkout_cart(cart_id, *, user=None, phone_number=None, shipping_address=None, note=None):
+    """
+    Cart -> Order bitta tranzaksiyada:
+      1. cart, uning itemlari va mahsulotlari deterministik (id) tartibda lock qilinadi
+         (PostgreSQL da SELECT ... FOR UPDATE, deadlock bo'lmasligi uchun doim bir xil tartib)
+      2. stock shartli UPDATE bilan kamaytiriladi: boshqalar band qilgan stock hisobga
+         olinadi va yetmasa 0 qator yangilanib butun tranzaksiya bekor qilinadi -
+         oversell bo'lmaydi
+      3. OrderItem lar bulk_create bilan (OrderItem.save dagi narx lookupisiz),
+         Order.total server tomonda hisoblanadi, cart deaktiv qilinadi
+    """
+    with transaction.atomic():
+        try:
+            cart = Cart.objects.select_for_update().get(pk=cart_id, is_active=True)
+        except Cart.DoesNotExist:
+            raise CheckoutError("Faol cart topilmadi.")
+
+        # itemlar ham lock qilinadi: release_expired shu qatorlarni SKIP LOCKED bilan o'tkazib
+        # yuboradi va reserved_quantity ni checkout bilan birga ikkinchi marta bo'shatmaydi
+        lines = list(
+            cart.items.select_for_update(of=("self",))
+            .order_by("product_id")
+            .values_list("product_id", "quantity", "reserved_quantity")
+        )
+        if not lines:
+            raise CheckoutError("Cart bo'sh.")
+
+        products = {
+            product.pk: product
+            for product in Product.objects.select_for_update()
+            .filter(pk__in=[product_id for product_id, _, _ in lines])
+            .order_by("pk")
+            .only("id", "title", "price", "discount_price")
+        }
+
+        for product_id, quantity, held in lines:
+            # cartning o'z reservationi (core.reservations) bo'shatilib, shu zahoti sotiladi
+            updated = Product.objects.filter(
+                pk=product_id, count__gte=F("reserved_count") - held + quantity
+            ).update(count=F("count") - quantity, reserved_count=F("reserved_count") - held)
+            if not updated:
+                raise CheckoutError(f"'{products[product_id].title}' uchun omborda yetarli mahsulot yo'q.")
+
+        order_items = []
+        total = 0
+        for product_id, quantity, _ in lines:
+            product = products[product_id]
+            unit_price = product.discount_price if product.discount_price is not None else product.price
+            line_total = unit_price * quantity
+            total += line_total
+            order_items.append(OrderItem(
+                product_id=product_id, quantity=quantity, unit_price=unit_price, total_price=line_total
+            ))
+
+        order = Order.objects.create(
+            user=cart.user or user,
+            phone_number=phone_number or getattr(cart.user or user, "phone_number", None),
+            total=total,
+            shipping_address=shipping_address,
+            note=note,
+        )
+        for item in order_items:
+            item.order = order
+        OrderItem.objects.bulk_create(order_items)
+
+        cart.items.update(reserved_quantity=0, reserved_until=None)
+        cart.is_active = False
+        cart.save(update_fields=["is_active", "updated_at"])
+
+        # count F() update bilan o'zgardi - signal ishlamaydi, product cache ni qo'lda eskirtiramiz
+        transaction.on_commit(lambda: bump_version("core.Product"))
+
+    return order
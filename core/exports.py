@@ -0,0 +1,118 @@
+import csv
+import json
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Order, OrderItem
+
+EXPORT_FORMATS = ("csv", "jsonl")
+CHUNK_SIZE = 1000
+
+ORDER_FIELDS = ("id", "user_id", "phone_number", "status", "total", "created_at", "shipping_address", "note")
+ITEM_FIELDS = ("id", "product_id", "product_title", "quantity", "unit_price", "total_price")
+CSV_HEADER = [f"order_{name}" for name in ORDER_FIELDS] + [f"item_{name}" for name in ITEM_FIELDS]
+
+
+class ExportError(Exception):
+    pass
+
+
+def parse_bound(value, end=False):
+    """"2025-01-31" yoki ISO datetime. Faqat sana berilsa `end` da kun oxiri olinadi."""
+    if not value:
+        return None
+    try:
+        # format to'g'ri, lekin sana mavjud bo'lmasa (2024-02-30) ValueError beradi.
+        # Sana birinchi: parse_datetime("2025-01-31") ham yarim tunni qaytaradi va kun oxiri yo'qolardi
+        day = parse_date(value)
+        parsed = parse_datetime(value) if day is None else None
+    except ValueError:
+        raise ExportError(f"Noto'g'ri sana: {value}")
+    if day is not None:
+        parsed = datetime.combine(day, time.max if end else time.min)
+    elif parsed is None:
+        raise ExportError(f"Noto'g'ri sana: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_statuses(value):
+    """"paid,shipped" -> ["paid", "shipped"]."""
+    statuses = [part.strip() for part in (value or "").split(",") if part.strip()]
+    valid = {choice for choice, _ in Order.STATUS_CHOICES}
+    unknown = [status for status in statuses if status not in valid]
+    if unknown:
+        raise ExportError(f"Noma'lum status: {', '.join(unknown)}")
+    return statuses
+
+
+def export_queryset(created_from=None, created_to=None, statuses=None):
+    """
+    Buyurtmalar created_at, id bo'yicha. Itemlar va product title lar har bir
+    iterator chunki uchun bitta prefetch so'rovi bilan keladi (N+1 yo'q).
+    PostgreSQL da iterator() server-side cursor ishlatadi, shuning uchun xotira
+    chunk hajmiga bog'liq, jami buyurtmalar soniga emas.
+    """
+    queryset = Order.objects.only(*ORDER_FIELDS).order_by("created_at", "id").prefetch_related(
+        Prefetch(
+            "items",
+            queryset=OrderItem.objects.select_related("product")
+            .only("id", "order_id", "product_id", "product__title", "quantity", "unit_price", "total_price")
+            .order_by("id"),
+        )
+    )
+    if created_from:
+        queryset = queryset.filter(created_at__gte=created_from)
+    if created_to:
+        queryset = queryset.filter(created_at__lte=created_to)
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    return queryset
+
+
+def _order_values(order):
+    return [getattr(order, name) for name in ORDER_FIELDS]
+
+
+def _item_values(item):
+    return [item.id, item.product_id, item.product.title, item.quantity, item.unit_price, item.total_price]
+
+
+class _Echo:
+    # csv.writer uchun: yozilgan qatorni saqlamasdan qaytaradi
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset, chunk_size=CHUNK_SIZE):
+    """Har bir order item bitta qator (order ustunlari takrorlanadi); itemsiz order - bo'sh item ustunlari."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    for order in queryset.iterator(chunk_size=chunk_size):
+        order_values = _order_values(order)
+        items = order.items.all()
+        if not items:
+            yield writer.writerow(order_values + [""] * len(ITEM_FIELDS))
+        for item in items:
+            yield writer.writerow(order_values + _item_values(item))
+
+
+def iter_jsonl(queryset, chunk_size=CHUNK_SIZE):
+    """Har bir order bitta JSON qator, itemlar ichida."""
+    for order in queryset.iterator(chunk_size=chunk_size):
+        data = dict(zip(ORDER_FIELDS, _order_values(order)))
+        data["items"] = [dict(zip(ITEM_FIELDS, _item_values(item))) for item in order.items.all()]
+        yield json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def iter_export(export_format, queryset, chunk_size=CHUNK_SIZE):
+    if export_format not in EXPORT_FORMATS:
+        raise ExportError(f"Format {', '.join(EXPORT_FORMATS)} dan biri bo'lishi kerak.")
+    if export_format == "csv":
+        return iter_csv(queryset, chunk_size)
+    return iter_jsonl(queryset, chunk_size)
@@ -0,0 +1,110 @@
+import io
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from PIL import Image, ImageOps
+
+from .cache import bump_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = {"thumb": 200, "medium": 600, "large": 1200}
+
+
+def derivative_sizes():
+    return getattr(settings, "IMAGE_DERIVATIVE_SIZES", DEFAULT_SIZES)
+
+
+def derivative_name(source, variant, extension):
+    # products/main/olma.jpg -> products/main/derived/olma_thumb.webp
+    directory, filename = posixpath.split(source)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, "derived", f"{stem}_{variant}.{extension}")
+
+
+def _save(name, image, format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **options)
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def generate_derivatives(source):
+    """
+    Original rasmdan har bir o'lcham uchun asl formatdagi (JPEG/PNG) va WebP
+    variantlarini yaratadi. Natija modelning image_variants JSON maydoniga yoziladi:
+    {"source": ..., "thumb": {"name", "webp", "width", "height"}, ...}
+    """
+    with default_storage.open(source, "rb") as file:
+        original = ImageOps.exif_transpose(Image.open(file))
+        original.load()
+
+    has_alpha = original.mode in ("RGBA", "LA") or "transparency" in original.info
+    original = original.convert("RGBA" if has_alpha else "RGB")
+    fallback_format, extension = ("PNG", "png") if has_alpha else ("JPEG", "jpg")
+
+    variants = {"source": source}
+    for variant, size in derivative_sizes().items():
+        image = original.copy()
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        variants[variant] = {
+            "name": _save(derivative_name(source, variant, extension), image, fallback_format, quality=85, optimize=True),
+            "webp": _save(derivative_name(source, variant, "webp"), image, "WEBP", quality=80, method=4),
+            "width": image.width,
+            "height": image.height,
+        }
+    return variants
+
+
+def delete_derivatives(variants):
+    for variant, data in (variants or {}).items():
+        if variant == "source":
+            continue
+        for name in (data["name"], data["webp"]):
+            default_storage.delete(name)
+
+
+def needs_derivatives(instance):
+    name = instance.image.name if instance.image else ""
+    return bool(name) and (instance.image_variants or {}).get("source") != name
+
+
+def store_derivatives(model, pk, source, variants):
+    # rasm shu orada almashtirilgan bo'lsa eski natija yozilmaydi
+    model.objects.filter(pk=pk, image=source).update(image_variants=variants)
+    bump_version(model._meta.label)
+
+
+# ------------------ BACKGROUND WORKER ------------------
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "IMAGE_DERIVATIVE_WORKERS", 2),
+            thread_name_prefix="image-derivatives",
+        )
+    return _executor
+
+
+def _process(model, pk, source):
+    close_old_connections()
+    try:
+        store_derivatives(model, pk, source, generate_derivatives(source))
+    except Exception:
+        logger.exception("Image derivative yaratib bo'lmadi: %s", source)
+    finally:
+        close_old_connections()
+
+
+def schedule_derivatives(instance):
+    """Request threadni band qilmasdan derivativelarni fon threadida yaratadi."""
+    return get_executor().submit(_process, type(instance), instance.pk, instance.image.name)
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.authentication import CachedJWTAuthentication
+from core.models import User
+
+PHONE = "+998030000000"
+
+
+class Command(BaseCommand):
+    help = (
+        "Bitta requestni autentifikatsiya qilish narxini o'lchaydi: simplejwt JWTAuthentication "
+        "va CachedJWTAuthentication (µs/request va requestga to'g'ri keladigan SQL so'rovlar)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(phone_number=PHONE)
+        factory = APIRequestFactory()
+        request = factory.get("/api/carts/", HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        count = options["requests"]
+
+        try:
+            for authentication in (JWTAuthentication(), CachedJWTAuthentication()):
+                authentication.authenticate(request)  # cache ni isitish
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    for _ in range(count):
+                        authenticated, _ = authentication.authenticate(request)
+                    elapsed = time.perf_counter() - started
+                assert authenticated.pk == user.pk
+                self.stdout.write(
+                    f"{type(authentication).__name__}: {elapsed / count * 1e6:.1f} µs/request, "
+                    f"{len(queries) / count:.2f} query/request"
+                )
+        finally:
+            user.delete()
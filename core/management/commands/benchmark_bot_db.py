@@ -0,0 +1,90 @@
+import asyncio
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Verification
+from core.verifications import VerificationRepository
+
+PHONE_PREFIX = "+99801"
+CHAT_ID_BASE = 8_000_000_000
+
+
+async def legacy_start(token, chat_id):
+    # bot.py dagi oldingi variant: har bir so'rov sync_to_async (bitta umumiy thread)
+    verification = await sync_to_async(Verification.objects.get)(token=token, is_used=False)
+    if verification.is_valid():
+        verification.chat_id = chat_id
+        await sync_to_async(verification.save)()
+
+
+async def legacy_pending(chat_id):
+    return await sync_to_async(
+        lambda: Verification.objects.filter(chat_id=chat_id, is_used=False).order_by("-created_at").first()
+    )()
+
+
+class Command(BaseCommand):
+    help = (
+        "Bot handlerlarining DB qismini (network siz) o'lchaydi: /start va contact xabarlari "
+        "uchun oldingi sync_to_async varianti va VerificationRepository ni messages/second "
+        "bo'yicha solishtiradi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=40)
+
+    def handle(self, *args, **options):
+        try:
+            for name in ("legacy", "repository"):
+                tokens = self.create_verifications(options["users"])
+                elapsed = asyncio.run(self.run(name, tokens, options["concurrency"]))
+                messages = len(tokens) * 2
+                self.stdout.write(f"{name}: {messages} ta xabar {elapsed:.2f}s - {messages / elapsed:.1f} msg/s")
+                Verification.objects.filter(phone_number__startswith=PHONE_PREFIX).delete()
+        finally:
+            Verification.objects.filter(phone_number__startswith=PHONE_PREFIX).delete()
+
+    def create_verifications(self, count):
+        expires_at = timezone.now() + timedelta(minutes=10)
+        verifications = Verification.objects.bulk_create([
+            Verification(
+                token=uuid.uuid4(),
+                phone_number=f"{PHONE_PREFIX}{index:07d}",
+                code=f"{random.randint(0, 999999):06d}",
+                expires_at=expires_at,
+            )
+            for index in range(count)
+        ])
+        return [str(verification.token) for verification in verifications]
+
+    async def run(self, name, tokens, concurrency):
+        repository = VerificationRepository(max_workers=concurrency) if name == "repository" else None
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def conversation(index, token):
+            chat_id = CHAT_ID_BASE + index
+            async with semaphore:
+                if repository:
+                    await repository.attach_chat(token, chat_id)
+                else:
+                    await legacy_start(token, chat_id)
+            async with semaphore:
+                if repository:
+                    await repository.pending_for_chat(chat_id)
+                else:
+                    await legacy_pending(chat_id)
+
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(conversation(index, token) for index, token in enumerate(tokens)))
+        finally:
+            if repository:
+                repository.close()
+        return time.perf_counter() - started
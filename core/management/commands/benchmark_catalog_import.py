@@ -0,0 +1,76 @@
+import csv
+import random
+import tempfile
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.catalog_import import import_catalog
+from core.models import Category, Product
+
+TITLE_PREFIX = "bench-import"
+CATEGORY_PREFIX = "Bench import"
+
+
+class Command(BaseCommand):
+    help = (
+        "N qatorli CSV fixture yaratib import_catalog ni o'lchaydi: birinchi o'tish (insert), "
+        "ikkinchi o'tish (update), va taqqoslash uchun bir qismini Product.save() bilan bittalab yozish."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--save-sample", type=int, default=2000, help="Product.save() bilan yoziladigan qatorlar")
+        parser.add_argument("--keep", action="store_true", help="Yaratilgan mahsulotlarni o'chirmaslik")
+
+    def handle(self, *args, **options):
+        rng = random.Random(1)
+        with tempfile.NamedTemporaryFile("w+", suffix=".csv", encoding="utf-8", newline="") as fixture:
+            self.write_fixture(fixture, options["rows"], rng)
+            try:
+                for label in ("insert", "update"):
+                    fixture.seek(0)
+                    report = import_catalog("csv", fixture, batch_size=options["batch_size"])
+                    self.stdout.write(
+                        f"import_catalog {label}: rows={report.rows} created={report.created} "
+                        f"updated={report.updated} failed={report.failed} "
+                        f"{report.elapsed:.2f}s {report.rows_per_second:.0f} rows/s"
+                    )
+                self.benchmark_save(options["save_sample"], rng)
+            finally:
+                if not options["keep"]:
+                    Product.objects.filter(title__startswith=TITLE_PREFIX).delete()
+                    Category.objects.filter(title__startswith=CATEGORY_PREFIX).delete()
+
+    def write_fixture(self, file, rows, rng):
+        writer = csv.writer(file)
+        writer.writerow(["title", "description", "category", "price", "discount_price", "count"])
+        for number in range(rows):
+            price = Decimal(rng.randint(1000, 500000)) / 100
+            # har 10-qatordagi title slug to'qnashuvini beradi ("... 7" va "... 7!" -> bir xil slug)
+            suffix = "!" if number % 10 == 9 else ""
+            writer.writerow([
+                f"{TITLE_PREFIX} {number // 10 * 10 if suffix else number}{suffix}",
+                f"Mahsulot {number} tavsifi",
+                f"{CATEGORY_PREFIX} {number % 50}",
+                price,
+                price * Decimal("0.9") if number % 3 == 0 else "",
+                rng.randint(0, 500),
+            ])
+        file.flush()
+
+    def benchmark_save(self, count, rng):
+        category = Category.objects.filter(title__startswith=CATEGORY_PREFIX).first()
+        started = time.perf_counter()
+        with transaction.atomic():
+            for number in range(count):
+                # import qilingan title dan slugi to'qnashadigan nom - save() slug loopi ishlaydi
+                Product.objects.create(
+                    title=f"{TITLE_PREFIX} {number}?", description="", category=category,
+                    price=Decimal(rng.randint(1000, 500000)) / 100, count=1,
+                )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Product.save() bittalab: rows={count} {elapsed:.2f}s {count / elapsed:.0f} rows/s")
@@ -0,0 +1,103 @@
+import statistics
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.utils import timezone
+
+from core.models import Verification
+
+PHONE_PREFIX = "bench-"
+
+
+class Command(BaseCommand):
+    help = (
+        "Bir nechta thread dan parallel write tranzaksiyalar (Verification insert + update) "
+        "yuborib writes/second, latency va 'database is locked' xatolarini o'lchaydi. "
+        "Profillarni solishtirish uchun DATABASE_URL ni o'zgartirib qayta ishga tushiring."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--transactions", type=int, default=200, help="Har bir thread uchun")
+
+    def handle(self, *args, **options):
+        alias = options["database"]
+        self.describe(alias)
+
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker(number):
+            own = []
+            failed = 0
+            try:
+                for i in range(options["transactions"]):
+                    started = time.perf_counter()
+                    try:
+                        self.write(alias, f"{PHONE_PREFIX}{number}-{i}")
+                    except OperationalError:
+                        failed += 1
+                        continue
+                    own.append(time.perf_counter() - started)
+            finally:
+                connections[alias].close()
+                with lock:
+                    latencies.extend(own)
+                    errors.append(failed)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(options["threads"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        Verification.objects.using(alias).filter(phone_number__startswith=PHONE_PREFIX).delete()
+        self.report(latencies, sum(errors), elapsed)
+
+    def write(self, alias, phone_number):
+        # login oqimiga o'xshash: kod yaratiladi, keyin ishlatilgan deb belgilanadi
+        with transaction.atomic(using=alias):
+            verification = Verification.objects.using(alias).create(
+                phone_number=phone_number, code="000000", expires_at=timezone.now() + timedelta(minutes=5)
+            )
+            Verification.objects.using(alias).filter(pk=verification.pk).update(is_used=True)
+
+    def describe(self, alias):
+        connection = connections[alias]
+        line = f"{connection.vendor}: {connection.settings_dict['NAME']}"
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                journal_mode = cursor.fetchone()[0]
+                cursor.execute("PRAGMA synchronous")
+                synchronous = cursor.fetchone()[0]
+            line += (
+                f" journal_mode={journal_mode} synchronous={synchronous}"
+                f" transaction_mode={getattr(connection, 'transaction_mode', None) or 'DEFERRED'}"
+            )
+        else:
+            line += f" CONN_MAX_AGE={connection.settings_dict['CONN_MAX_AGE']}"
+            if "pool" in connection.settings_dict["OPTIONS"]:
+                line += f" pool={connection.settings_dict['OPTIONS']['pool']}"
+        connection.close()
+        self.stdout.write(line)
+
+    def report(self, latencies, errors, elapsed):
+        if not latencies:
+            self.stdout.write(self.style.ERROR(f"Birorta tranzaksiya o'tmadi (xatolar: {errors})"))
+            return
+        latencies.sort()
+        p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+        self.stdout.write(
+            f"  transactions={len(latencies)} errors={errors}\n"
+            f"  tx/s={len(latencies) / elapsed:.1f} "
+            f"mean={statistics.mean(latencies) * 1000:.1f}ms "
+            f"p50={statistics.median(latencies) * 1000:.1f}ms p99={p99 * 1000:.1f}ms"
+        )
@@ -0,0 +1,87 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from core.models import User, Verification
+from core.views import LoginAPIView
+
+PHONE_PREFIX = "+99802"
+PHONES = 50_000
+
+
+def phone(index):
+    return f"{PHONE_PREFIX}{index:07d}"
+
+
+class Command(BaseCommand):
+    help = (
+        "LoginAPIView latency ni Verification jadvalidagi tarixiy qatorlar soniga qarab o'lchaydi. "
+        "--rows gacha tarixiy (ishlatilgan va eskirgan) qator qo'shadi, keyin --logins ta login qiladi. "
+        "Turli --rows bilan ishga tushirib p50/p99 solishtiriladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--logins", type=int, default=500)
+        parser.add_argument("--cleanup", action="store_true", help="Oxirida benchmark qatorlarini o'chirish")
+
+    def handle(self, *args, **options):
+        self.seed(options["rows"])
+        self.stdout.write(
+            Verification.objects.filter(phone_number="+998000000000", code="000000", is_used=False)
+            .order_by("-created_at").explain()
+        )
+
+        factory = APIRequestFactory()
+        view = LoginAPIView.as_view()
+        latencies = []
+        failed = 0
+        for _ in range(options["logins"]):
+            number = phone(random.randrange(PHONES))
+            code = f"{random.randint(0, 999999):06d}"
+            Verification.objects.create(
+                phone_number=number, code=code, expires_at=timezone.now() + timedelta(minutes=10)
+            )
+            request = factory.post("/api/login/", {"phone_number": number, "verification_code": code}, format="json")
+            started = time.perf_counter()
+            response = view(request)
+            latencies.append(time.perf_counter() - started)
+            failed += response.status_code != 200
+
+        latencies.sort()
+        total = Verification.objects.count()
+        self.stdout.write(
+            f"verification rows={total} logins={len(latencies)} failed={failed}\n"
+            f"  p50={statistics.median(latencies) * 1000:.2f}ms "
+            f"p99={latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000:.2f}ms"
+        )
+
+        if options["cleanup"]:
+            Verification.objects.filter(phone_number__startswith=PHONE_PREFIX).delete()
+            User.objects.filter(phone_number__startswith=PHONE_PREFIX).delete()
+
+    def seed(self, rows):
+        missing = rows - Verification.objects.filter(phone_number__startswith=PHONE_PREFIX).count()
+        if missing <= 0:
+            return
+        self.stdout.write(f"{missing} ta tarixiy verification qo'shilmoqda...")
+        now = timezone.now()
+        batch = []
+        for index in range(missing):
+            issued_at = now - timedelta(minutes=random.randint(15, 60 * 24 * 365))
+            batch.append(Verification(
+                phone_number=phone(random.randrange(PHONES)),
+                code=f"{random.randint(0, 999999):06d}",
+                expires_at=issued_at + timedelta(minutes=10),
+                is_used=random.random() < 0.7,
+                chat_id=random.randrange(10**9),
+            ))
+            if len(batch) == 10_000:
+                Verification.objects.bulk_create(batch)
+                batch = []
+        Verification.objects.bulk_create(batch)
@@ -0,0 +1,163 @@
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+import aiohttp
+from aiohttp import web
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Verification
+
+PHONE_PREFIX = "+99800"
+CHAT_ID_BASE = 9_000_000_000
+
+
+class FakeTelegramAPI:
+    """
+    Bot API o'rnini bosuvchi lokal server: har qanday method ga muvaffaqiyatli javob
+    qaytaradi va sendMessage chaqiruvlarini sanaydi. Bot BOT_API_URL=http://host:port
+    bilan shu serverga yo'naltiriladi.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.sent_messages = 0
+
+    async def handle(self, request):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        method = request.match_info["method"]
+        data = await request.post()
+        if method.lower() == "sendmessage":
+            self.sent_messages += 1
+            result = {
+                "message_id": self.sent_messages,
+                "date": int(time.time()),
+                "chat": {"id": int(data.get("chat_id", 0)), "type": "private"},
+                "text": data.get("text", ""),
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def start(self, host, port):
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+
+class Command(BaseCommand):
+    help = (
+        "bot_webhook.py ni yuklama bilan sinaydi: fake Telegram API ni ishga tushiradi, "
+        "N ta Verification yaratadi va webhookga /start <token> hamda contact update larini "
+        "parallel yuborib updates/second va latency ni o'lchaydi. Bot workerlari "
+        "BOT_API_URL=http://<fake-api-host>:<fake-api-port> bilan ishga tushirilgan bo'lishi kerak."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--webhook-url", default="http://127.0.0.1:8080/webhook")
+        parser.add_argument("--secret", default="", help="BOT_WEBHOOK_SECRET bilan bir xil")
+        parser.add_argument("--fake-api-host", default="127.0.0.1")
+        parser.add_argument("--fake-api-port", type=int, default=8081)
+        parser.add_argument("--fake-api-latency", type=float, default=0.0, help="Soniya, Telegram RTT taqlidi")
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=50)
+
+    def handle(self, *args, **options):
+        verifications = self.create_verifications(options["users"])
+        try:
+            asyncio.run(self.run(verifications, options))
+        finally:
+            Verification.objects.filter(phone_number__startswith=PHONE_PREFIX).delete()
+
+    def create_verifications(self, count):
+        expires_at = timezone.now() + timedelta(minutes=10)
+        return Verification.objects.bulk_create([
+            Verification(
+                token=uuid.uuid4(),
+                phone_number=f"{PHONE_PREFIX}{index:07d}",
+                code=f"{random.randint(0, 999999):06d}",
+                expires_at=expires_at,
+            )
+            for index in range(count)
+        ])
+
+    async def run(self, verifications, options):
+        fake_api = FakeTelegramAPI(latency=options["fake_api_latency"])
+        runner = await fake_api.start(options["fake_api_host"], options["fake_api_port"])
+        headers = {"X-Telegram-Bot-Api-Secret-Token": options["secret"]} if options["secret"] else {}
+
+        def start_update(index, verification):
+            return self.message_update(index, CHAT_ID_BASE + index, text=f"/start {verification.token}")
+
+        def contact_update(index, verification):
+            chat_id = CHAT_ID_BASE + index
+            return self.message_update(len(verifications) + index, chat_id, contact={
+                "phone_number": verification.phone_number.lstrip("+"),
+                "first_name": "Load",
+                "user_id": chat_id,
+            })
+
+        try:
+            async with aiohttp.ClientSession(headers=headers) as session:
+                for name, build in (("start_cmd", start_update), ("phone_handler", contact_update)):
+                    sent_before = fake_api.sent_messages
+                    updates = [build(index, verification) for index, verification in enumerate(verifications)]
+                    latencies, errors, elapsed = await self.send_all(
+                        session, options["webhook_url"], updates, options["concurrency"]
+                    )
+                    self.report(name, latencies, errors, elapsed, fake_api.sent_messages - sent_before)
+        finally:
+            await runner.cleanup()
+
+    @staticmethod
+    def message_update(update_id, chat_id, **fields):
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": chat_id, "is_bot": False, "first_name": "Load"},
+                **fields,
+            },
+        }
+
+    async def send_all(self, session, url, updates, concurrency):
+        latencies = []
+        errors = 0
+        pending = iter(updates)
+
+        async def worker():
+            nonlocal errors
+            for update in pending:
+                started = time.perf_counter()
+                try:
+                    async with session.post(url, json=update) as response:
+                        await response.read()
+                        if response.status >= 400:
+                            errors += 1
+                except aiohttp.ClientError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - started
+
+    def report(self, name, latencies, errors, elapsed, replies):
+        latencies.sort()
+        p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+        self.stdout.write(
+            f"{name}\n"
+            f"  updates={len(latencies)} errors={errors} replies={replies}\n"
+            f"  updates/s={len(latencies) / elapsed:.1f} "
+            f"p50={statistics.median(latencies) * 1000:.1f}ms p99={p99 * 1000:.1f}ms"
+        )
@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import (
+    CHUNK_SIZE, EXPORT_FORMATS, ExportError, export_queryset, iter_export, parse_bound, parse_statuses,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Buyurtmalar va itemlarini CSV yoki JSONL ga stream qilib yozadi (xotira o'zgarmas). "
+        "Masalan: export_orders --format csv --from 2025-01-01 --to 2025-01-31 --status paid,shipped -o orders.csv"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", dest="export_format", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument("--from", dest="created_from", help="YYYY-MM-DD yoki ISO datetime")
+        parser.add_argument("--to", dest="created_to", help="YYYY-MM-DD yoki ISO datetime (sana bo'lsa kun oxirigacha)")
+        parser.add_argument("--status", help="Vergul bilan ajratilgan statuslar")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument("-o", "--output", help="Fayl yo'li (berilmasa stdout)")
+
+    def handle(self, *args, **options):
+        try:
+            queryset = export_queryset(
+                created_from=parse_bound(options["created_from"]),
+                created_to=parse_bound(options["created_to"], end=True),
+                statuses=parse_statuses(options["status"]),
+            )
+            rows = iter_export(options["export_format"], queryset, options["chunk_size"])
+        except ExportError as exc:
+            raise CommandError(str(exc))
+
+        output = open(options["output"], "w", encoding="utf-8", newline="") if options["output"] else sys.stdout
+        try:
+            for row in rows:
+                output.write(row)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,43 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+
+from core.images import generate_derivatives, store_derivatives
+from core.models import Category, Product, ProductCommentImage, ProductImage, SliderImage
+
+IMAGE_MODELS = (Category, Product, ProductImage, ProductCommentImage, SliderImage)
+
+
+def _init_worker():
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = "Mavjud media uchun thumbnail/WebP variantlarini process pool da yaratadi (backfill)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Process soni (default: CPU soni)")
+        parser.add_argument("--force", action="store_true", help="Tayyor variantlarni ham qayta yaratish")
+
+    def handle(self, *args, **options):
+        tasks = []
+        for model in IMAGE_MODELS:
+            rows = model.objects.exclude(image="").exclude(image__isnull=True).values_list("pk", "image", "image_variants")
+            for pk, name, variants in rows.iterator(chunk_size=2000):
+                if options["force"] or (variants or {}).get("source") != name:
+                    tasks.append((model, pk, name))
+
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=_init_worker) as executor:
+            futures = {executor.submit(generate_derivatives, name): (model, pk, name) for model, pk, name in tasks}
+            for future in as_completed(futures):
+                model, pk, name = futures[future]
+                try:
+                    store_derivatives(model, pk, name, future.result())
+                    done += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{model._meta.label}#{pk} ({name}): {exc}")
+
+        self.stdout.write(self.style.SUCCESS(f"{done} ta rasm qayta ishlandi, {failed} ta xato"))
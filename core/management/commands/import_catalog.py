@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.catalog_import import BATCH_SIZE, IMPORT_FORMATS, CatalogImportError, import_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Mahsulotlarni CSV yoki JSONL fayldan partiyalab title bo'yicha upsert qiladi "
+        "(ustunlar: title, price, description, category, discount_price, count, image, images). "
+        "Masalan: import_catalog products.csv --images-dir /data/photos"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", dest="import_format", choices=IMPORT_FORMATS, help="Berilmasa fayl kengaytmasidan")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--images-dir", help="image/images yo'llari ildizi (default: CATALOG_IMPORT_ROOT)")
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        import_format = options["import_format"] or path.suffix.lstrip(".").lower()
+        try:
+            with path.open(encoding="utf-8-sig", newline="") as lines:
+                report = import_catalog(
+                    import_format, lines,
+                    batch_size=options["batch_size"],
+                    images_root=options["images_dir"],
+                    using=options["database"],
+                )
+        except (CatalogImportError, OSError) as exc:
+            raise CommandError(str(exc))
+
+        for error in report.errors:
+            self.stderr.write(f"  {error['line']}-qator: {error['error']}")
+        self.stdout.write(
+            f"rows={report.rows} created={report.created} updated={report.updated} failed={report.failed} "
+            f"categories_created={report.categories_created} images_added={report.images_added}\n"
+            f"{report.elapsed:.2f}s, {report.rows_per_second:.0f} rows/s"
+        )
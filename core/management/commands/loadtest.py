@@ -0,0 +1,66 @@
+import asyncio
+import statistics
+import time
+
+import aiohttp
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Berilgan URL larga parallel GET yuborib requests/second va latency (p50/p99) ni o'lchaydi. "
+        "ASGI va WSGI ni solishtirish uchun: bir xil URL ni uvicorn config.asgi:application va "
+        "gunicorn config.wsgi:application ostida ishga tushirib, natijalarni taqqoslang."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="+")
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--timeout", type=float, default=30)
+
+    def handle(self, *args, **options):
+        for url in options["urls"]:
+            latencies, errors, elapsed = asyncio.run(
+                self.run(url, options["concurrency"], options["requests"], options["timeout"])
+            )
+            self.report(url, latencies, errors, elapsed, options["concurrency"])
+
+    async def run(self, url, concurrency, total, timeout):
+        latencies = []
+        errors = 0
+        remaining = iter(range(total))
+
+        async def worker(session):
+            nonlocal errors
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    async with session.get(url) as response:
+                        await response.read()
+                        if response.status >= 400:
+                            errors += 1
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+        return latencies, errors, elapsed
+
+    def report(self, url, latencies, errors, elapsed, concurrency):
+        latencies.sort()
+
+        def percentile(p):
+            return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000
+
+        self.stdout.write(
+            f"{url}\n"
+            f"  requests={len(latencies)} concurrency={concurrency} errors={errors}\n"
+            f"  rps={len(latencies) / elapsed:.1f} "
+            f"mean={statistics.mean(latencies) * 1000:.1f}ms "
+            f"p50={percentile(0.50):.1f}ms p99={percentile(0.99):.1f}ms"
+        )
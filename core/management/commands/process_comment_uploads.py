@@ -0,0 +1,27 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.uploads import process_pending
+
+
+class Command(BaseCommand):
+    help = "Navbatdagi comment rasm uploadlarini qayta ishlaydi (alohida worker sifatida --interval bilan)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100)
+        parser.add_argument("--stale-minutes", type=int, default=10,
+                            help="Shuncha daqiqadan beri processing da qolgan joblar qayta navbatga qo'yiladi")
+        parser.add_argument("--interval", type=int, default=0,
+                            help="Soniya. 0 dan katta bo'lsa to'xtatilguncha takrorlanadi")
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(minutes=options["stale_minutes"])
+        while True:
+            processed = process_pending(limit=options["limit"], stale_after=stale_after)
+            self.stdout.write(f"{processed} ta upload qayta ishlandi")
+            if options["interval"] <= 0:
+                break
+            if not processed:
+                time.sleep(options["interval"])
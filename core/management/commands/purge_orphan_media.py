@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.storage import content_addressed_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Hech bir qator havola qilmaydigan content-addressed media fayllarni (commit bo'lmagan "
+        "upload, rollback bo'lgan import) grace davri o'tgach derivativelari bilan o'chiradi. Cron bilan."
+    )
+
+    def handle(self, *args, **options):
+        purged = content_addressed_storage().purge_orphans()
+        self.stdout.write(f"{purged} ta fayl o'chirildi")
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.verifications import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Muddati o'tgan verification kodlarini batch-batch o'chiradi (cron yoki --interval bilan daemon)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--pause", type=float, default=0.05, help="Batchlar orasidagi tanaffus, soniya")
+        parser.add_argument(
+            "--interval", type=int, default=0,
+            help="Soniya. 0 dan katta bo'lsa to'xtatilguncha shu oraliqda takrorlanadi",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            purged = purge_expired(batch_size=options["batch_size"], pause=options["pause"])
+            self.stdout.write(f"{purged} ta verification o'chirildi")
+            if options["interval"] <= 0:
+                break
+            time.sleep(options["interval"])
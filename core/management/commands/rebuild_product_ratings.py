@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from core.models import Product, ProductComment
+
+RATING_FIELDS = ["rating_count", "rating_sum", "rating_avg"] + [f"rating_{star}" for star in range(1, 6)]
+
+
+class Command(BaseCommand):
+    help = "Product rating agregatlarini ProductComment jadvalidan qayta hisoblaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        # barcha mahsulotlar uchun bitta GROUP BY
+        aggregates = {
+            row["product"]: row
+            for row in ProductComment.objects.order_by().values("product").annotate(
+                count=Count("id"),
+                total=Sum("rating"),
+                **{f"star_{star}": Count("id", filter=Q(rating=star)) for star in range(1, 6)},
+            )
+        }
+
+        updated = 0
+        batch = []
+        products = Product.objects.only("id", *RATING_FIELDS).order_by("id")
+        for product in products.iterator(chunk_size=batch_size):
+            row = aggregates.get(product.id)
+            product.rating_count = row["count"] if row else 0
+            product.rating_sum = row["total"] if row else 0
+            product.rating_avg = product.rating_sum / product.rating_count if product.rating_count else 0
+            for star in range(1, 6):
+                setattr(product, f"rating_{star}", row[f"star_{star}"] if row else 0)
+            batch.append(product)
+
+            if len(batch) >= batch_size:
+                updated += self.flush(batch)
+                batch = []
+        updated += self.flush(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"{updated} ta mahsulot rating agregatlari yangilandi"))
+
+    def flush(self, batch):
+        if not batch:
+            return 0
+        with transaction.atomic():
+            Product.objects.bulk_update(batch, RATING_FIELDS)
+        return len(batch)
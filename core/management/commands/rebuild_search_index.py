@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Product full-text qidiruv indeksini noldan qayta quradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(options["database"])
+        backend.install()
+        total = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"{type(backend).__name__}: {total} ta mahsulot indekslandi"
+        ))
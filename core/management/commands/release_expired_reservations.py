@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.reservations import release_expired
+
+
+class Command(BaseCommand):
+    help = "Muddati o'tgan stock reservationlarini batch-batch bo'shatadi (cron yoki --interval bilan daemon)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--interval", type=int, default=0,
+            help="Soniya. 0 dan katta bo'lsa to'xtatilguncha shu oraliqda takrorlanadi",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_expired(batch_size=options["batch_size"])
+            self.stdout.write(f"{released} ta reservation bo'shatildi")
+            if options["interval"] <= 0:
+                break
+            time.sleep(options["interval"])
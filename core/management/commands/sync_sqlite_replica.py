@@ -0,0 +1,46 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Lokal sinov uchun: primary SQLite faylini DATABASE_REPLICAS dagi SQLite fayllarga "
+        "online backup API bilan nusxalaydi (replikatsiya o'rnida). --interval bilan "
+        "davriy takrorlanadi, bu esa replication lag ni ham taqlid qiladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Soniya. 0 dan katta bo'lsa to'xtatilguncha shu oraliqda takrorlanadi",
+        )
+
+    def handle(self, *args, **options):
+        primary = connections["default"].settings_dict
+        if primary["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("Primary SQLite emas - replikatsiyani database o'zi bajaradi.")
+        replicas = [
+            alias for alias in settings.DATABASE_REPLICAS
+            if connections[alias].settings_dict["ENGINE"] == "django.db.backends.sqlite3"
+        ]
+        if not replicas:
+            raise CommandError("SQLite replica topilmadi (DATABASE_REPLICA_URLS).")
+
+        while True:
+            for alias in replicas:
+                connections[alias].close()
+                source = sqlite3.connect(primary["NAME"])
+                target = sqlite3.connect(connections[alias].settings_dict["NAME"])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                    source.close()
+                self.stdout.write(f"default -> {alias} nusxalandi")
+            if options["interval"] <= 0:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,55 @@
+from django.conf import settings
+
+from . import routers
+from .storage import CAS_PREFIX
+
+
+class ImmutableMediaCacheMiddleware:
+    """
+    Content-addressed media (MEDIA_URL + cas/) URL lari kontent o'zgarsa o'zi
+    o'zgaradi, shuning uchun ularga far-future immutable Cache-Control qo'yiladi.
+    Prod da media nginx/CDN dan berilsa, xuddi shu header u yerda ham sozlanadi.
+    """
+    cache_control = "public, max-age=31536000, immutable"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = f"{settings.MEDIA_URL}{CAS_PREFIX}"
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # derived/ variantlar sozlamalar o'zgarsa shu nom bilan qayta yaratiladi
+        if (
+            response.status_code == 200
+            and request.path.startswith(self.prefix)
+            and "/derived/" not in request.path
+        ):
+            response["Cache-Control"] = self.cache_control
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    core.routers.PrimaryReplicaRouter uchun request holatini o'rnatadi: xavfsiz
+    methodlar katalogni replica dan o'qishi mumkin, yozuvchi requestlar to'liq
+    primary da ishlaydi. Request yozgan bo'lsa javobga qisqa muddatli cookie
+    qo'yiladi - keyingi GET lar ham replication lag tugaguncha primary dan o'qiydi.
+    """
+    safe_methods = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.cookie_name = getattr(settings, "REPLICA_PIN_COOKIE", "db_primary_pin")
+        self.pin_seconds = getattr(settings, "REPLICA_PIN_SECONDS", 5)
+
+    def __call__(self, request):
+        token = routers.begin(
+            allow_replica=request.method in self.safe_methods and self.cookie_name not in request.COOKIES
+        )
+        try:
+            response = self.get_response(request)
+            if routers.current_state().pinned:
+                response.set_cookie(self.cookie_name, "1", max_age=self.pin_seconds, httponly=True, samesite="Lax")
+        finally:
+            routers.end(token)
+        return response
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_alter_orderitem_total_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SliderImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to='sliders/', verbose_name='Slider Image')),
+            ],
+            options={
+                'verbose_name': 'Slider Image',
+                'verbose_name_plural': 'Slider Images',
+            },
+        ),
+    ]
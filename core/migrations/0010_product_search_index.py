@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def install_search_index(apps, schema_editor):
+    from core.search import get_search_backend
+
+    backend = get_search_backend(schema_editor.connection.alias)
+    backend.install()
+    backend.rebuild()
+
+
+def uninstall_search_index(apps, schema_editor):
+    from core.search import get_search_backend
+
+    get_search_backend(schema_editor.connection.alias).uninstall()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_product_category_created_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentImageUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('staged_file', models.FileField(blank=True, upload_to='staging/comments/')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_uploads', to='core.productcomment')),
+                ('result', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload', to='core.productcommentimage')),
+            ],
+            options={
+                'verbose_name': 'Comment Image Upload',
+                'verbose_name_plural': 'Comment Image Uploads',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='commentupload_status_idx')],
+            },
+        ),
+    ]
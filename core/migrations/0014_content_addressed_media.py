@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:57
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_comment_image_upload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Stored File',
+                'verbose_name_plural': 'Stored Files',
+            },
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.content_addressed_storage, upload_to='categories/', verbose_name='Image'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.content_addressed_storage, upload_to='products/main/', verbose_name='Main Image'),
+        ),
+        migrations.AlterField(
+            model_name='productcommentimage',
+            name='image',
+            field=models.ImageField(storage=core.storage.content_addressed_storage, upload_to='products/comments/', verbose_name='Comment Image'),
+        ),
+        migrations.AlterField(
+            model_name='productimage',
+            name='image',
+            field=models.ImageField(storage=core.storage.content_addressed_storage, upload_to='products/gallery/', verbose_name='Image'),
+        ),
+        migrations.AlterField(
+            model_name='sliderimage',
+            name='image',
+            field=models.ImageField(storage=core.storage.content_addressed_storage, upload_to='sliders/', verbose_name='Slider Image'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_content_addressed_media'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='verification',
+            index=models.Index(condition=models.Q(('is_used', False)), fields=['phone_number', 'code', '-created_at'], name='verification_login_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verification',
+            index=models.Index(condition=models.Q(('is_used', False)), fields=['chat_id', '-created_at'], name='verification_chat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verification',
+            index=models.Index(fields=['expires_at'], name='verification_expires_at_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_verification_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThrottleStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=50)),
+                ('period_start', models.DateTimeField()),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Throttle Stat',
+                'verbose_name_plural': 'Throttle Stats',
+                'ordering': ['-period_start', 'scope'],
+                'constraints': [models.UniqueConstraint(fields=('scope', 'period_start'), name='throttlestat_scope_period_uniq')],
+            },
+        ),
+    ]
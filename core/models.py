@@ -1,13 +1,34 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils.text import slugify
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils import timezone
 import uuid
 from django.conf import settings
 
+from .storage import content_addressed_storage
+
+
+class StoredFile(models.Model):
+    """ContentAddressedStorage dagi fayl va unga havola qilayotgan qatorlar soni."""
+    name = models.CharField(max_length=255, unique=True)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Stored File"
+        verbose_name_plural = "Stored Files"
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount})"
+
+
 class Category(models.Model):
     title = models.CharField(max_length=150, unique=True, verbose_name="Title")
-    image = models.ImageField(upload_to="categories/", blank=True, null=True, verbose_name="Image")
+    image = models.ImageField(upload_to="categories/", storage=content_addressed_storage, blank=True, null=True, verbose_name="Image")
+    # thumbnail/WebP variantlari (core.images), upload dan keyin fon threadida to'ldiriladi
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     slug = models.SlugField(unique=True, blank=True, editable=False)
     
     class Meta:
@@ -31,18 +52,51 @@ class Category(models.Model):
 
 
 class Product(models.Model):
+    category = models.ForeignKey(
+        Category, on_delete=models.SET_NULL, blank=True, null=True,
+        related_name="products", verbose_name="Category"
+    )
     title = models.CharField(max_length=200, unique=True, verbose_name="Title")
     description = models.TextField(verbose_name="Description")
-    image = models.ImageField(upload_to="products/main/", blank=True, null=True, verbose_name="Main Image")
+    image = models.ImageField(upload_to="products/main/", storage=content_addressed_storage, blank=True, null=True, verbose_name="Main Image")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     count = models.PositiveIntegerField(default=0, verbose_name="Stock Count")
+    # faol CartItem reservationlari yig'indisi (core.reservations), mavjud = count - reserved_count
+    reserved_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Reserved Count")
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Price")
     discount_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Discount Price")
     slug = models.SlugField(unique=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # ProductComment yozilganda/o'chirilganda inkremental yangilanadi (core.signals),
+    # to'liq qayta hisoblash: manage.py rebuild_product_ratings
+    rating_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Rating Count")
+    rating_sum = models.PositiveIntegerField(default=0, editable=False, verbose_name="Rating Sum")
+    rating_avg = models.FloatField(default=0, editable=False, verbose_name="Average Rating")
+    rating_1 = models.PositiveIntegerField(default=0, editable=False, verbose_name="1-star Count")
+    rating_2 = models.PositiveIntegerField(default=0, editable=False, verbose_name="2-star Count")
+    rating_3 = models.PositiveIntegerField(default=0, editable=False, verbose_name="3-star Count")
+    rating_4 = models.PositiveIntegerField(default=0, editable=False, verbose_name="4-star Count")
+    rating_5 = models.PositiveIntegerField(default=0, editable=False, verbose_name="5-star Count")
 
     class Meta:
         verbose_name = "Product"
         verbose_name_plural = "Products"
         ordering = ["title"]
+        indexes = [
+            models.Index(fields=["rating_avg", "rating_count"], name="product_rating_idx"),
+            models.Index(fields=["created_at", "id"], name="product_created_at_idx"),
+            # category bo'yicha filtr + tartiblash bitta index scan bo'lishi uchun
+            models.Index(fields=["category", "price", "id"], name="product_category_price_idx"),
+            models.Index(fields=["category", "created_at", "id"], name="product_category_created_idx"),
+        ]
+
+    # F() delta bilan yangilanadigan hisoblagichlar (core.signals, core.reservations, checkout).
+    # Oddiy save() ularni yozmaydi - aks holda xotiradagi eski qiymat parallel deltalarni yo'qotadi
+    COUNTER_FIELDS = (
+        "reserved_count", "rating_count", "rating_sum", "rating_avg",
+        "rating_1", "rating_2", "rating_3", "rating_4", "rating_5",
+    )
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -53,15 +107,27 @@ class Product(models.Model):
                 slug = f"{base_slug}-{counter}"
                 counter += 1
             self.slug = slug
+        if not self._state.adding and self.pk is not None and not args and kwargs.get("update_fields") is None:
+            # hisoblagichlarni yozish kerak bo'lsa update_fields da aniq ko'rsatiladi
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS and field.attname not in deferred
+            ]
         super().save(*args, **kwargs)
 
+    @property
+    def available_count(self):
+        return max(self.count - self.reserved_count, 0)
+
     def __str__(self):
         return self.title
 
 
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="images")
-    image = models.ImageField(upload_to="products/gallery/", verbose_name="Image")
+    image = models.ImageField(upload_to="products/gallery/", storage=content_addressed_storage, verbose_name="Image")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     class Meta:
         verbose_name = "Product Image"
@@ -86,13 +152,23 @@ class ProductComment(models.Model):
         verbose_name_plural = "Product Comments"
         ordering = ["-id"]
 
+    def save(self, *args, **kwargs):
+        # Product rating agregatlari signal ichida yangilanadi - comment bilan bitta tranzaksiyada
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            return super().delete(*args, **kwargs)
+
     def __str__(self):
         return f"Comment by {self.user} on {self.product.title}"
 
 
 class ProductCommentImage(models.Model):
     comment = models.ForeignKey(ProductComment, on_delete=models.CASCADE, related_name="images")
-    image = models.ImageField(upload_to="products/comments/", verbose_name="Comment Image")
+    image = models.ImageField(upload_to="products/comments/", storage=content_addressed_storage, verbose_name="Comment Image")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     class Meta:
         verbose_name = "Product Comment Image"
@@ -101,6 +177,39 @@ class ProductCommentImage(models.Model):
     def __str__(self):
         return f"Image for {self.comment.user}'s comment"
 
+class CommentImageUpload(models.Model):
+    """
+    ProductCommentImage uchun navbatdagi upload: fayl staging ga saqlanadi,
+    qayta ishlash (validatsiya, EXIF tozalash, re-encode, resize) core.uploads worker ida.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    comment = models.ForeignKey(ProductComment, on_delete=models.CASCADE, related_name="image_uploads")
+    staged_file = models.FileField(upload_to="staging/comments/", blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    result = models.OneToOneField(
+        ProductCommentImage, on_delete=models.SET_NULL, blank=True, null=True, related_name="upload"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Comment Image Upload"
+        verbose_name_plural = "Comment Image Uploads"
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="commentupload_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"Upload #{self.id} - {self.status}"
+
 class UserManager(BaseUserManager):
     def create_user(self, phone_number, password=None, **extra_fields):
         if not phone_number:
@@ -142,12 +251,47 @@ class Verification(models.Model):
     is_used = models.BooleanField(default=False)
     chat_id = models.BigIntegerField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # LoginAPIView: phone_number + code + is_used=False, eng yangisi
+            models.Index(
+                fields=["phone_number", "code", "-created_at"],
+                condition=models.Q(is_used=False),
+                name="verification_login_idx",
+            ),
+            # bot phone_handler: chat_id + is_used=False, eng yangisi
+            models.Index(
+                fields=["chat_id", "-created_at"],
+                condition=models.Q(is_used=False),
+                name="verification_chat_idx",
+            ),
+            # purge_verifications
+            models.Index(fields=["expires_at"], name="verification_expires_at_idx"),
+        ]
+
     def is_valid(self):
         return (not self.is_used) and timezone.now() <= self.expires_at
 
     def __str__(self):
         return f"{self.phone_number} - {self.code}"
     
+class CartQuerySet(models.QuerySet):
+    def with_totals(self):
+        """
+        total_items va subtotal ni SQL da bitta aggregate bilan hisoblaydi:
+        SUM(quantity), SUM(COALESCE(discount_price, price) * quantity).
+        """
+        money = DecimalField(max_digits=12, decimal_places=2)
+        line_total = ExpressionWrapper(
+            Coalesce(F("items__product__discount_price"), F("items__product__price")) * F("items__quantity"),
+            output_field=money,
+        )
+        return self.annotate(
+            annotated_total_items=Coalesce(Sum("items__quantity"), 0),
+            annotated_subtotal=Coalesce(Sum(line_total), Value(0), output_field=money),
+        )
+
+
 class Cart(models.Model):
     """
     Har bir Cart user bilan bog'lanishi mumkin yoki guest session_key bilan.
@@ -159,6 +303,8 @@ class Cart(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    objects = CartQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Cart"
         verbose_name_plural = "Carts"
@@ -168,15 +314,21 @@ class Cart(models.Model):
             return f"Cart of {self.user}"
         return f"Guest cart ({self.session_key})"
 
+    def _totals(self):
+        # Cart.objects.with_totals() bilan olingan bo'lsa qo'shimcha query yo'q
+        if not hasattr(self, "annotated_total_items"):
+            totals = Cart.objects.filter(pk=self.pk).with_totals().values(
+                "annotated_total_items", "annotated_subtotal"
+            ).get()
+            self.annotated_total_items = totals["annotated_total_items"]
+            self.annotated_subtotal = totals["annotated_subtotal"]
+        return self.annotated_total_items, self.annotated_subtotal
+
     def total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        return self._totals()[0]
 
     def subtotal(self):
-        total = 0
-        for item in self.items.select_related('product').all():
-            price = item.product.discount_price if item.product.discount_price is not None else item.product.price
-            total += price * item.quantity
-        return total
+        return self._totals()[1]
 
 
 class CartItem(models.Model):
@@ -184,11 +336,21 @@ class CartItem(models.Model):
     product = models.ForeignKey("Product", on_delete=models.PROTECT)
     quantity = models.PositiveIntegerField(default=1)
     added_at = models.DateTimeField(auto_now_add=True)
+    reserved_quantity = models.PositiveIntegerField(default=0, editable=False)
+    reserved_until = models.DateTimeField(blank=True, null=True, editable=False)
 
     class Meta:
         verbose_name = "Cart Item"
         verbose_name_plural = "Cart Items"
         unique_together = ("cart", "product")
+        indexes = [
+            # sweeper faqat band qilingan qatorlarni muddat bo'yicha ko'radi
+            models.Index(
+                fields=["reserved_until"],
+                condition=models.Q(reserved_quantity__gt=0),
+                name="cartitem_reserved_until_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.quantity} x {self.product.title}"
@@ -217,6 +379,9 @@ class Order(models.Model):
         verbose_name = "Order"
         verbose_name_plural = "Orders"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="order_created_at_idx"),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} - {self.status}"
@@ -246,7 +411,8 @@ class OrderItem(models.Model):
         return f"{self.quantity} x {self.product.title} (Order {self.order.id})"
 
 class SliderImage(models.Model):
-    image = models.ImageField(upload_to="sliders/", verbose_name="Slider Image")
+    image = models.ImageField(upload_to="sliders/", storage=content_addressed_storage, verbose_name="Slider Image")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     def __str__(self):
         return f"Slider Image {self.id}"
@@ -254,3 +420,26 @@ class SliderImage(models.Model):
     class Meta:
         verbose_name = "Slider Image"
         verbose_name_plural = "Slider Images"
+
+
+class ThrottleStat(models.Model):
+    """
+    Rad etilgan (429) requestlar soni, scope va soat bo'yicha. Hisoblagichlar
+    cache da (core.throttling), bu jadvalga daqiqasiga ko'pi bilan bir marta
+    ko'chiriladi - hujum paytida har bir rad etish uchun DB ga yozilmaydi.
+    """
+    scope = models.CharField(max_length=50)
+    period_start = models.DateTimeField()
+    rejected = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Throttle Stat"
+        verbose_name_plural = "Throttle Stats"
+        ordering = ["-period_start", "scope"]
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "period_start"], name="throttlestat_scope_period_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.period_start:%Y-%m-%d %H:00} - {self.rejected}"
@@ -0,0 +1,40 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination: OFFSET o'rniga indekslangan ustun bo'yicha
+    WHERE ... > cursor, shuning uchun chuqur sahifalar ham O(page) turadi.
+    """
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "id"
+    unique_fields = ("id", "pk")
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        # OrderingFilter (masalan ?ordering=price) unique bo'lmagan ustun berishi
+        # mumkin - tartib barqaror bo'lishi uchun id ni tie-breaker qilib qo'shamiz
+        if ordering[-1].lstrip("-") not in self.unique_fields:
+            tiebreaker = "-id" if ordering[0].startswith("-") else "id"
+            ordering = ordering + (tiebreaker,)
+        return ordering
+
+
+class CategoryPagination(KeysetPagination):
+    ordering = "title"
+    unique_fields = ("id", "pk", "title", "slug")
+
+
+class ProductPagination(KeysetPagination):
+    ordering = "title"
+    unique_fields = ("id", "pk", "title", "slug")
+
+
+class ProductCommentPagination(KeysetPagination):
+    ordering = "-id"
+
+
+class OrderPagination(KeysetPagination):
+    ordering = "-created_at"
@@ -0,0 +1,130 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, PositiveIntegerField, When
+from django.utils import timezone
+
+from .models import Cart, CartItem, Product
+
+
+class ReservationError(Exception):
+    pass
+
+
+def reservation_ttl():
+    return timedelta(minutes=getattr(settings, "STOCK_RESERVATION_MINUTES", 10))
+
+
+def release(rows):
+    """
+    rows: (product_id, reserved_quantity) juftliklari. Product.reserved_count
+    bitta UPDATE ... CASE bilan kamaytiriladi.
+
+    reserved_count o'zgarishi product cache versiyasini oshirmaydi: aks holda har bir
+    add-to-cart butun product list/detail cache ni eskirtiradi. Shuning uchun
+    reserved_count cache qilinadigan product javoblarida yo'q - mavjud stock
+    cache siz /api/products/availability/ dan o'qiladi.
+    """
+    per_product = defaultdict(int)
+    for product_id, quantity in rows:
+        if quantity:
+            per_product[product_id] += quantity
+    if not per_product:
+        return 0
+
+    Product.objects.filter(pk__in=per_product).update(
+        reserved_count=Case(
+            *(When(pk=pk, then=F("reserved_count") - quantity) for pk, quantity in per_product.items()),
+            default=F("reserved_count"),
+            output_field=PositiveIntegerField(),
+        )
+    )
+    return sum(per_product.values())
+
+
+def release_excess(cart_id):
+    """
+    quantity kamaytirilgan itemlarning ortiqcha reservationini (reserved_quantity - quantity)
+    bo'shatadi va reserved_quantity ni quantity gacha tushiradi. quantity ni o'zgartirgan
+    tranzaksiya ichida chaqiriladi.
+    """
+    rows = list(
+        CartItem.objects.select_for_update(of=("self",))
+        .filter(cart_id=cart_id, reserved_quantity__gt=F("quantity"))
+        .values_list("id", "product_id", "reserved_quantity", "quantity")
+    )
+    if not rows:
+        return 0
+    CartItem.objects.filter(id__in=[item_id for item_id, _, _, _ in rows]).update(reserved_quantity=F("quantity"))
+    return release([(product_id, reserved - quantity) for _, product_id, reserved, quantity in rows])
+
+
+def reserve_cart(cart_id):
+    """
+    Cart dagi har bir item uchun stockni reservation_ttl() muddatga band qiladi.
+    Product qatorlari sessiya davomida lock qilinmaydi: har bir item uchun bitta
+    shartli UPDATE (count - reserved_count >= delta) - yetmasa tranzaksiya bekor.
+    Qayta chaqirilsa muddat uzaytiriladi va quantity o'zgargan bo'lsa farq band qilinadi.
+    """
+    with transaction.atomic():
+        if not Cart.objects.filter(pk=cart_id, is_active=True).exists():
+            raise ReservationError("Faol cart topilmadi.")
+
+        items = list(
+            CartItem.objects.select_for_update(of=("self",))
+            .filter(cart_id=cart_id)
+            .select_related("product")
+            .only("id", "product_id", "quantity", "reserved_quantity", "reserved_until", "product__title")
+            .order_by("product_id")
+        )
+        reserved_until = timezone.now() + reservation_ttl()
+        released = []
+
+        for item in items:
+            delta = item.quantity - item.reserved_quantity
+            if delta > 0:
+                updated = Product.objects.filter(
+                    pk=item.product_id, count__gte=F("reserved_count") + delta
+                ).update(reserved_count=F("reserved_count") + delta)
+                if not updated:
+                    raise ReservationError(f"'{item.product.title}' uchun omborda yetarli mahsulot yo'q.")
+            elif delta < 0:
+                released.append((item.product_id, -delta))
+            item.reserved_quantity = item.quantity
+            item.reserved_until = reserved_until
+
+        release(released)
+        CartItem.objects.bulk_update(items, ["reserved_quantity", "reserved_until"])
+
+    return reserved_until
+
+
+def release_expired(batch_size=500, now=None):
+    """
+    Muddati o'tgan reservationlarni batch-batch bo'shatadi: har bir batch uchun bitta
+    SELECT, bitta CartItem UPDATE va bitta Product UPDATE (release). Har bir batch
+    alohida qisqa tranzaksiya, shuning uchun uzoq write lock bo'lmaydi. PostgreSQL da
+    SKIP LOCKED bilan bir nechta sweeper parallel ishlay oladi.
+    """
+    now = now or timezone.now()
+    total = 0
+    while True:
+        with transaction.atomic():
+            expired = CartItem.objects.filter(reserved_quantity__gt=0, reserved_until__lt=now)
+            # tanlangan qatorlar tranzaksiya oxirigacha o'zgarmaydi: PostgreSQL/MySQL da
+            # row lock (checkout lock qilgan itemlar o'tkazib yuboriladi), SQLite da
+            # IMMEDIATE tranzaksiya boshidanoq write lock oladi
+            if connection.features.has_select_for_update_skip_locked:
+                expired = expired.select_for_update(skip_locked=True)
+            elif connection.features.has_select_for_update:
+                expired = expired.select_for_update()
+            batch = list(expired.order_by("reserved_until").values_list("id", "product_id", "reserved_quantity")[:batch_size])
+            if not batch:
+                return total
+            CartItem.objects.filter(id__in=[item_id for item_id, _, _ in batch], reserved_until__lt=now).update(
+                reserved_quantity=0, reserved_until=None
+            )
+            release([(product_id, quantity) for _, product_id, quantity in batch])
+        total += len(batch)
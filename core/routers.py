@@ -0,0 +1,99 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+# replica dan o'qilishi mumkin bo'lgan (katalog) modellar
+DEFAULT_REPLICATED_MODELS = (
+    "core.Category",
+    "core.Product",
+    "core.ProductImage",
+    "core.ProductComment",
+    "core.ProductCommentImage",
+)
+
+
+class RoutingState:
+    __slots__ = ("allow_replica", "pinned", "replica")
+
+    def __init__(self, allow_replica):
+        self.allow_replica = allow_replica
+        self.pinned = False
+        self.replica = None
+
+
+_state = ContextVar("db_routing_state", default=None)
+
+
+def replica_aliases():
+    return getattr(settings, "DATABASE_REPLICAS", ())
+
+
+def replicated_models():
+    return getattr(settings, "REPLICATED_MODELS", DEFAULT_REPLICATED_MODELS)
+
+
+def begin(allow_replica):
+    return _state.set(RoutingState(allow_replica))
+
+
+def end(token):
+    _state.reset(token)
+
+
+def current_state():
+    return _state.get()
+
+
+def pin_to_primary():
+    """Joriy request qolgan qismini primary ga bog'laydi (read-your-writes)."""
+    state = _state.get()
+    if state is not None:
+        state.pinned = True
+
+
+@contextmanager
+def use_primary():
+    token = begin(allow_replica=False)
+    try:
+        yield
+    finally:
+        end(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Katalog modellarining o'qishlari DATABASE_REPLICAS aliaslaridan biriga
+    yuboriladi, lekin faqat:
+      - ReplicaRoutingMiddleware xavfsiz (GET/HEAD/OPTIONS) request deb belgilagan bo'lsa
+        (management command, bot, fon workerlari doim primary dan o'qiydi);
+      - request shu paytgacha yozmagan bo'lsa (birinchi yozuvdan keyin pin);
+      - primary da ochiq tranzaksiya bo'lmasa.
+    Bitta request davomida bitta replica tanlanadi. Yozuvlar doim "default" ga.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.allow_replica or state.pinned:
+            return None
+        if model._meta.label not in replicated_models() or not replica_aliases():
+            return None
+        if connections["default"].in_atomic_block:
+            return None
+        if state.replica is None:
+            state.replica = random.choice(replica_aliases())
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicalar primary ning nusxasi - hamma aliaslar bitta ma'lumot
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replica sxemasi replikatsiya orqali keladi (lokal: sync_sqlite_replica)
+        return db not in replica_aliases()
@@ -0,0 +1,191 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    return [token.lower() for token in TOKEN_RE.findall(text or "")]
+
+
+# ------------------ BACKENDS ------------------
+class SearchBackend:
+    """
+    Product qidiruv indeksi. search() querysetni mos keladigan mahsulotlar bilan
+    cheklaydi va `search_rank` annotatsiyasini qo'shadi (kichik = yaxshiroq).
+    """
+    # signal orqali har bir Product save/delete da indeksni yangilash kerakmi
+    needs_sync = False
+
+    def __init__(self, using="default"):
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def install(self):
+        pass
+
+    def uninstall(self):
+        pass
+
+    def index(self, products):
+        pass
+
+    def remove(self, product_ids):
+        pass
+
+    def rebuild(self):
+        return 0
+
+    def search(self, queryset, text):
+        raise NotImplementedError
+
+    def no_results(self, queryset):
+        # ordering search_rank ga tayanadi, shuning uchun bo'sh natijada ham annotatsiya bo'lsin
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """Lokal/dev uchun SQLite FTS5 inverted index (rowid = Product.id)."""
+    table = "core_product_fts"
+    # title dagi moslik description dagidan 10 barobar og'irroq
+    title_weight = 10.0
+    description_weight = 1.0
+    needs_sync = True
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                "title, description, tokenize='unicode61 remove_diacritics 2')"
+            )
+
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index(self, products):
+        rows = [(p.id, p.title, p.description) for p in products]
+        if not rows:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, title, description) VALUES (%s, %s, %s)", rows
+            )
+
+    def remove(self, product_ids):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(pk,) for pk in product_ids])
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, title, description) "
+                "SELECT id, title, description FROM core_product"
+            )
+            cursor.execute(f"SELECT count(*) FROM {self.table}")
+            return cursor.fetchone()[0]
+
+    def match_expression(self, text):
+        # har bir so'z prefix sifatida: "olm"* "shar"* (typeahead uchun)
+        return " ".join(f'"{token}"*' for token in tokenize(text))
+
+    def search(self, queryset, text):
+        match = self.match_expression(text)
+        if not match:
+            return self.no_results(queryset)
+        table = queryset.model._meta.db_table
+        return queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", (match,))
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT bm25({self.table}, %s, %s) FROM {self.table} "
+                f"WHERE {self.table} MATCH %s AND rowid = {table}.id",
+                (self.title_weight, self.description_weight, match),
+                output_field=FloatField(),
+            )
+        )
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Production uchun PostgreSQL tsvector. Indeks GIN expression index, uni
+    PostgreSQL o'zi yangilaydi - signal orqali sinxronlash shart emas.
+    """
+    config = "simple"
+    index_name = "core_product_search_idx"
+
+    def vector_sql(self, table):
+        return (
+            f"(setweight(to_tsvector('{self.config}', {table}.title), 'A') || "
+            f"setweight(to_tsvector('{self.config}', {table}.description), 'B'))"
+        )
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.index_name} ON core_product "
+                f"USING GIN ({self.vector_sql('core_product')})"
+            )
+
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP INDEX IF EXISTS {self.index_name}")
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"REINDEX INDEX {self.index_name}")
+            cursor.execute("SELECT count(*) FROM core_product")
+            return cursor.fetchone()[0]
+
+    def match_expression(self, text):
+        return " & ".join(f"{token}:*" for token in tokenize(text))
+
+    def search(self, queryset, text):
+        match = self.match_expression(text)
+        if not match:
+            return self.no_results(queryset)
+        vector = self.vector_sql(queryset.model._meta.db_table)
+        query = f"to_tsquery('{self.config}', %s)"
+        return queryset.filter(
+            RawSQL(f"{vector} @@ {query}", (match,), output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f"-ts_rank({vector}, {query})", (match,), output_field=FloatField())
+        )
+
+
+def get_search_backend(using="default"):
+    """
+    settings.PRODUCT_SEARCH_BACKEND bo'lsa o'sha klass, aks holda database
+    vendoriga qarab tanlanadi.
+    """
+    backend_path = getattr(settings, "PRODUCT_SEARCH_BACKEND", None)
+    if backend_path:
+        return import_string(backend_path)(using)
+    if connections[using].vendor == "postgresql":
+        return PostgresSearchBackend(using)
+    return SQLiteFTS5Backend(using)
+
+
+# ------------------ DRF FILTER ------------------
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    ?search= ni LIKE '%term%' o'rniga full-text indeks orqali bajaradi.
+    Natijalar `search_rank` bo'yicha tartiblanadi (ProductViewSet.ordering).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "").strip()
+        if not text:
+            return queryset
+        return get_search_backend(queryset.db).search(queryset, text)
@@ -1,43 +1,161 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from .models import (
-    Category, Product, ProductImage, ProductComment, ProductCommentImage,
+    Category, Product, ProductImage, ProductComment, ProductCommentImage, CommentImageUpload,
     Cart, CartItem, Order, OrderItem, User
 )
 
+
+# ------------------ SPARSE FIELDSETS ------------------
+def parse_csv_param(request, name):
+    # DRF Request (query_params) va oddiy Django HttpRequest (GET, async viewlar) uchun
+    params = getattr(request, "query_params", request.GET)
+    value = params.get(name, "")
+    return {part.strip() for part in value.split(",") if part.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=title,price - faqat ko'rsatilgan maydonlar qaytadi.
+    ?expand=images - Meta.expandable_fields dagi nested relationlarni qo'shadi.
+    Parametrlar berilmasa serializer to'liq javob qaytaradi.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.selected_field_names(self.context.get("request"), self.fields.keys())
+        if selected is not None:
+            for name in set(self.fields) - selected:
+                self.fields.pop(name)
+
+    @classmethod
+    def selected_field_names(cls, request, available):
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        fields = parse_csv_param(request, "fields")
+        expand = parse_csv_param(request, "expand")
+        if not fields and not expand:
+            return None
+
+        available = set(available)
+        expandable = set(getattr(cls.Meta, "expandable_fields", ()))
+        selected = fields or (available - expandable)
+        selected |= expand & expandable
+        return selected & available
+
+
+# ------------------ IMAGE VARIANTS ------------------
+class ImageVariantsField(serializers.Field):
+    """
+    image_variants JSON ini URL larga aylantiradi:
+    {"thumb": {"url", "webp", "width", "height"}, ...}. Hali tayyor bo'lmasa {}.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get("request")
+
+        def url(name):
+            location = default_storage.url(name)
+            return request.build_absolute_uri(location) if request is not None else location
+
+        return {
+            variant: {"url": url(data["name"]), "webp": url(data["webp"]), "width": data["width"], "height": data["height"]}
+            for variant, data in (value or {}).items()
+            if variant != "source"
+        }
+
+
 # ------------------ CATEGORY & PRODUCT ------------------
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Category
         fields = "__all__"
 
 
-class ProductImageSerializer(serializers.ModelSerializer):
+class ProductImageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = ProductImage
         fields = "__all__"
 
 
-class ProductCommentImageSerializer(serializers.ModelSerializer):
+class ProductCommentImageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = ProductCommentImage
         fields = "__all__"
 
 
-class ProductCommentSerializer(serializers.ModelSerializer):
+class CommentImageUploadSerializer(serializers.ModelSerializer):
+    """
+    Upload qabul qilish uchun: fayl bu yerda decode qilinmaydi (FileField,
+    ImageField emas) - tekshiruv core.uploads worker ida.
+    """
+    image = serializers.FileField(write_only=True, source="staged_file")
+    result = ProductCommentImageSerializer(read_only=True)
+
+    class Meta:
+        model = CommentImageUpload
+        fields = ("id", "comment", "image", "status", "error", "result", "created_at", "updated_at")
+        read_only_fields = ("status", "error", "result", "created_at", "updated_at")
+
+    def validate_image(self, value):
+        max_size = settings.COMMENT_IMAGE_MAX_UPLOAD_SIZE
+        if value.size > max_size:
+            raise serializers.ValidationError(f"Fayl hajmi {max_size // (1024 * 1024)} MB dan oshmasligi kerak.")
+        return value
+
+
+class ProductCommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     images = ProductCommentImageSerializer(many=True, read_only=True)
 
     class Meta:
         model = ProductComment
         fields = "__all__"
+        expandable_fields = ("images",)
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
     comments = ProductCommentSerializer(many=True, read_only=True)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Product
-        fields = "__all__"
+        # reservationlar bilan tez-tez o'zgaradi va product cache versiyasini oshirmaydi -
+        # mavjud stock cache qilinmaydigan /api/products/availability/ dan olinadi
+        exclude = ("reserved_count",)
+        expandable_fields = ("images", "comments")
+
+
+class ProductAvailabilitySerializer(serializers.ModelSerializer):
+    available_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Product
+        fields = ("id", "available_count")
+
+
+class ProductSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Katalog grid sahifalari uchun yengil variant: description, galereya va commentlarsiz."""
+    image_variants = ImageVariantsField()
+
+    class Meta:
+        model = Product
+        fields = (
+            "id", "category", "title", "slug", "price", "discount_price", "image", "image_variants",
+            "rating_avg", "rating_count",
+        )
 
 # ------------------ AUTH ------------------
 class RegisterSerializer(serializers.Serializer):
@@ -48,20 +166,23 @@ class LoginSerializer(serializers.Serializer):
     verification_code = serializers.CharField(max_length=6)
 
 # ------------------ CART ------------------
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     product_title = serializers.CharField(source="product.title", read_only=True)
     product_slug = serializers.CharField(source="product.slug", read_only=True)
     product_price = serializers.SerializerMethodField()
 
     class Meta:
         model = CartItem
-        fields = ("id", "cart", "product", "product_title", "product_slug", "product_price", "quantity", "added_at")
+        fields = (
+            "id", "cart", "product", "product_title", "product_slug", "product_price", "quantity", "added_at",
+            "reserved_quantity", "reserved_until",
+        )
 
     def get_product_price(self, obj):
         return obj.product.discount_price if obj.product.discount_price is not None else obj.product.price
 
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
     total_items = serializers.IntegerField(read_only=True)
     subtotal = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
@@ -69,6 +190,7 @@ class CartSerializer(serializers.ModelSerializer):
     class Meta:
         model = Cart
         fields = ("id", "user", "session_key", "is_active", "items", "total_items", "subtotal", "created_at", "updated_at")
+        expandable_fields = ("items",)
 
 
 class AddCartItemSerializer(serializers.Serializer):
@@ -79,8 +201,32 @@ class AddCartItemSerializer(serializers.Serializer):
 class UpdateCartItemSerializer(serializers.Serializer):
     quantity = serializers.IntegerField(min_value=0)  # 0 -> delete
 
+
+class CartItemOperationListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        # har bir qator uchun alohida query o'rniga barcha productlar bitta query da tekshiriladi
+        product_ids = {item["product"] for item in attrs}
+        existing = set(Product.objects.filter(pk__in=product_ids).values_list("pk", flat=True))
+        missing = sorted(product_ids - existing)
+        if missing:
+            raise serializers.ValidationError(f"Mahsulot topilmadi: {missing}")
+        return attrs
+
+
+class CartItemOperationSerializer(UpdateCartItemSerializer):
+    product = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        list_serializer_class = CartItemOperationListSerializer
+
+
+class CheckoutSerializer(serializers.Serializer):
+    phone_number = serializers.CharField(max_length=20, required=False, allow_blank=True)
+    shipping_address = serializers.CharField(required=False, allow_blank=True)
+    note = serializers.CharField(required=False, allow_blank=True)
+
 # ------------------ ORDER ------------------
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     product_title = serializers.CharField(source="product.title", read_only=True)
 
     class Meta:
@@ -88,10 +234,11 @@ class OrderItemSerializer(serializers.ModelSerializer):
         fields = ("id", "product", "product_title", "quantity", "unit_price", "total_price")
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
 
     class Meta:
         model = Order
         fields = ("id", "user", "phone_number", "total", "status", "shipping_address", "note", "created_at", "items")
         read_only_fields = ("total", "status", "created_at", "items")
+        expandable_fields = ("items",)
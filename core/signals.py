@@ -0,0 +1,191 @@
+from django.db import transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import bump_user_version
+from .cache import bump_version
+from .images import delete_derivatives, needs_derivatives, schedule_derivatives
+from .models import (
+    Category, CartItem, Product, ProductComment, ProductCommentImage, ProductImage, SliderImage, User
+)
+from .reservations import release
+from .storage import content_addressed_storage
+from .search import get_search_backend
+from .suggest import suggest_index
+
+
+# ------------------ PRODUCT RATING ------------------
+def apply_rating_delta(product_id, rating, sign, using=None):
+    """
+    Product rating agregatlarini bitta UPDATE bilan o'zgartiradi.
+    sign=+1 comment qo'shilganda, -1 olib tashlanganda.
+    """
+    count = F("rating_count") + sign
+    total = F("rating_sum") + sign * rating
+    Product.objects.using(using).filter(pk=product_id).update(
+        rating_count=count,
+        rating_sum=total,
+        # UPDATE ichida o'ng tomon eski qiymatlarni ko'radi, shuning uchun
+        # o'rtacha yangi count/sum dan hisoblanadi
+        rating_avg=Coalesce(
+            Cast(total, FloatField()) / NullIf(count, 0),
+            Value(0.0),
+            output_field=FloatField(),
+        ),
+        **{f"rating_{rating}": F(f"rating_{rating}") + sign},
+    )
+
+
+@receiver(pre_save, sender=ProductComment)
+def remember_previous_rating(sender, instance, raw=False, using=None, **kwargs):
+    instance._previous_rating = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_rating = (
+        ProductComment.objects.using(using)
+        .filter(pk=instance.pk)
+        .values_list("product_id", "rating")
+        .first()
+    )
+
+
+@receiver(post_save, sender=ProductComment)
+def update_rating_on_save(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    current = (instance.product_id, instance.rating)
+    previous = getattr(instance, "_previous_rating", None)
+    if previous == current:
+        return
+    if previous is not None:
+        apply_rating_delta(*previous, sign=-1, using=using)
+    apply_rating_delta(*current, sign=1, using=using)
+
+
+@receiver(post_delete, sender=ProductComment)
+def update_rating_on_delete(sender, instance, using=None, **kwargs):
+    apply_rating_delta(instance.product_id, instance.rating, sign=-1, using=using)
+
+
+# ------------------ SEARCH INDEX ------------------
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, using=None, **kwargs):
+    backend = get_search_backend(using)
+    if backend.needs_sync:
+        backend.index([instance])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, using=None, **kwargs):
+    backend = get_search_backend(using)
+    if backend.needs_sync:
+        backend.remove([instance.pk])
+
+
+# ------------------ SUGGEST INDEX ------------------
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Product)
+def refresh_suggest_entry(sender, instance, using=None, **kwargs):
+    kind = "category" if sender is Category else "product"
+    pk, title, slug = instance.pk, instance.title, instance.slug
+    transaction.on_commit(lambda: suggest_index.update(kind, pk, title, slug), using=using)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Product)
+def drop_suggest_entry(sender, instance, using=None, **kwargs):
+    kind = "category" if sender is Category else "product"
+    pk = instance.pk
+    transaction.on_commit(lambda: suggest_index.remove(kind, pk), using=using)
+
+
+# ------------------ RESPONSE CACHE ------------------
+CACHED_MODELS = (Category, Product, ProductImage, ProductComment, ProductCommentImage)
+
+
+def bump_model_version(sender, using=None, **kwargs):
+    label = sender._meta.label
+    transaction.on_commit(lambda: bump_version(label), using=using)
+
+
+for model in CACHED_MODELS:
+    post_save.connect(bump_model_version, sender=model, dispatch_uid=f"cache-version-save-{model._meta.label}")
+    post_delete.connect(bump_model_version, sender=model, dispatch_uid=f"cache-version-delete-{model._meta.label}")
+
+
+# ------------------ AUTH USER CACHE ------------------
+@receiver(post_save, sender=User, dispatch_uid="auth-user-version-save")
+@receiver(post_delete, sender=User, dispatch_uid="auth-user-version-delete")
+def invalidate_cached_user(sender, instance, using=None, **kwargs):
+    # core.authentication.CachedJWTAuthentication dagi eski nusxa endi o'qilmaydi.
+    # pk oldindan olinadi: delete da Collector commit gacha instance.pk ni None qiladi
+    pk = instance.pk
+    transaction.on_commit(lambda: bump_user_version(pk), using=using)
+
+
+# ------------------ STOCK RESERVATIONS ------------------
+@receiver(post_delete, sender=CartItem)
+def release_deleted_reservation(sender, instance, **kwargs):
+    if instance.reserved_quantity:
+        release([(instance.product_id, instance.reserved_quantity)])
+
+
+# ------------------ IMAGE DERIVATIVES ------------------
+IMAGE_MODELS = (Category, Product, ProductImage, ProductCommentImage, SliderImage)
+
+
+def queue_image_derivatives(sender, instance, raw=False, using=None, **kwargs):
+    if raw or not needs_derivatives(instance):
+        return
+    transaction.on_commit(lambda: schedule_derivatives(instance), using=using)
+
+
+for model in IMAGE_MODELS:
+    post_save.connect(queue_image_derivatives, sender=model, dispatch_uid=f"image-derivatives-{model._meta.label}")
+
+
+# ------------------ CONTENT-ADDRESSED MEDIA ------------------
+def release_image(name, variants):
+    if content_addressed_storage().release(name):
+        delete_derivatives(variants)
+
+
+def remember_previous_image(sender, instance, raw=False, using=None, **kwargs):
+    instance._previous_image = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_image = (
+        sender.objects.using(using).filter(pk=instance.pk).values_list("image", "image_variants").first()
+    )
+
+
+def acquire_saved_image(sender, instance, raw=False, using=None, **kwargs):
+    # havola qator saqlangandan keyin, shu tranzaksiyada: save/rollback muvaffaqiyatsiz
+    # bo'lsa refcount ham oshmaydi (fayl diskda qolsa purge_orphan_media tozalaydi)
+    name = instance.image.name if instance.image else ""
+    previous = getattr(instance, "_previous_image", None)
+    if raw or not name or (previous and previous[0] == name):
+        return
+    content_addressed_storage().acquire(name)
+
+
+def release_replaced_image(sender, instance, raw=False, using=None, **kwargs):
+    previous = getattr(instance, "_previous_image", None)
+    if raw or not previous or previous[0] == instance.image.name:
+        return
+    transaction.on_commit(lambda: release_image(*previous), using=using)
+
+
+def release_deleted_image(sender, instance, using=None, **kwargs):
+    name, variants = instance.image.name, instance.image_variants
+    transaction.on_commit(lambda: release_image(name, variants), using=using)
+
+
+for model in IMAGE_MODELS:
+    uid = model._meta.label
+    pre_save.connect(remember_previous_image, sender=model, dispatch_uid=f"cas-previous-{uid}")
+    post_save.connect(acquire_saved_image, sender=model, dispatch_uid=f"cas-acquired-{uid}")
+    post_save.connect(release_replaced_image, sender=model, dispatch_uid=f"cas-replaced-{uid}")
+    post_delete.connect(release_deleted_image, sender=model, dispatch_uid=f"cas-deleted-{uid}")
@@ -0,0 +1,160 @@
+import hashlib
+import os
+import posixpath
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F, FileField
+
+CAS_PREFIX = "cas/"
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Fayl nomi kontent hashidan olinadi: cas/ab/cd/<sha256>.<ext>. Bir xil fayl
+    qayta yuklansa diskka qayta yozilmaydi. Havolalar soni StoredFile.refcount da:
+    u upload paytida emas, model qatori saqlanganda (core.signals post_save,
+    qator bilan bitta tranzaksiyada) oshiriladi - validatsiya xatosi yoki rollback
+    bo'lsa havola ham yo'q. Fayl oxirgi havola o'chirilganda (release) diskdan
+    o'chiriladi; hech kim havola qilmay qolgan fayllarni purge_orphans() tozalaydi.
+    URL kontentga bog'liq bo'lgani uchun uni immutable sifatida cache qilish mumkin.
+    """
+    # yangi saqlangan/qayta yuklangan fayl shuncha soniya release/purge dan himoyalangan:
+    # save() va post_save dagi acquire() orasida boshqa qatorning release() i uni o'chirmasin
+    grace_seconds = 10 * 60
+
+    def __init__(self, **kwargs):
+        # bir xil nom = bir xil kontent, parallel yozishda ustiga yozish xavfsiz
+        kwargs.setdefault("allow_overwrite", True)
+        super().__init__(**kwargs)
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        if hasattr(content, "seek"):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if hasattr(content, "seek"):
+            content.seek(0)
+        hexdigest = digest.hexdigest()
+        extension = posixpath.splitext(name)[1].lower()
+        return f"{CAS_PREFIX}{hexdigest[:2]}/{hexdigest[2:4]}/{hexdigest}{extension}"
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            from django.core.files import File
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        self.store(name, content)
+        return name
+
+    def store(self, name, content):
+        """Faylni diskka yozadi (bor bo'lsa mtime yangilanadi - grace_seconds qaytadan boshlanadi)."""
+        if self.exists(name):
+            try:
+                os.utime(self.path(name))
+                return
+            except FileNotFoundError:
+                pass
+        super()._save(name, content)
+
+    def acquire(self, name, count=1, content=None):
+        """`name` ga `count` ta havola qo'shadi; `content` berilsa va fayl diskda bo'lmasa yoziladi."""
+        from .models import StoredFile
+
+        if not name or not name.startswith(CAS_PREFIX):
+            return
+        # avval havola olinadi (qator lock), keyin fayl yo'q bo'lsa yoziladi -
+        # parallel release faylni o'chirib yuborgan bo'lsa ham qayta tiklanadi
+        with transaction.atomic():
+            if not StoredFile.objects.filter(name=name).update(refcount=F("refcount") + count):
+                try:
+                    with transaction.atomic():
+                        StoredFile.objects.create(name=name, refcount=count)
+                except IntegrityError:
+                    StoredFile.objects.filter(name=name).update(refcount=F("refcount") + count)
+            if content is not None:
+                self.store(name, content)
+
+    def is_recent(self, name, now=None):
+        try:
+            modified = os.path.getmtime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return (now or time.time()) - modified < self.grace_seconds
+
+    def release(self, name):
+        """
+        Havolani kamaytiradi; oxirgisi bo'lsa faylni o'chirib True qaytaradi.
+        Fayl yaqinda saqlangan bo'lsa (hali commit bo'lmagan upload) u diskda
+        qoldiriladi - purge_orphans() grace_seconds dan keyin o'chiradi.
+        """
+        from .models import StoredFile
+
+        if not name or not name.startswith(CAS_PREFIX):
+            return False
+        with transaction.atomic():
+            stored = StoredFile.objects.select_for_update().filter(name=name).first()
+            if stored is None:
+                return False
+            if stored.refcount > 1:
+                StoredFile.objects.filter(pk=stored.pk).update(refcount=F("refcount") - 1)
+                return False
+            stored.delete()
+            if self.is_recent(name):
+                return False
+            self.delete(name)
+        return True
+
+    def referencing_fields(self):
+        return [
+            (model, field)
+            for model in apps.get_models()
+            for field in model._meta.concrete_fields
+            if isinstance(field, FileField) and field.storage is self
+        ]
+
+    def is_referenced(self, name):
+        from .models import StoredFile
+
+        if StoredFile.objects.filter(name=name).exists():
+            return True
+        # post_save dagi acquire dan oldin to'xtab qolgan save (crash) - qator bor, StoredFile yo'q
+        return any(model._default_manager.filter(**{field.name: name}).exists() for model, field in self.referencing_fields())
+
+    def purge_orphans(self, now=None):
+        """
+        Hech bir qator havola qilmaydigan va grace_seconds dan eski fayllarni (derivativelari
+        bilan) o'chiradi: commit bo'lmagan upload, rollback bo'lgan import partiyasi va h.k.
+        O'chirilgan fayllar sonini qaytaradi.
+        """
+        root = Path(self.path(CAS_PREFIX))
+        if not root.is_dir():
+            return 0
+        purged = 0
+        for path in root.rglob("*"):
+            if not path.is_file() or "derived" in path.parts:
+                continue
+            name = path.relative_to(self.location).as_posix()
+            if self.is_recent(name, now) or self.is_referenced(name):
+                continue
+            self.delete(name)
+            for derived in path.parent.joinpath("derived").glob(f"{path.stem}_*"):
+                derived.unlink(missing_ok=True)
+            purged += 1
+        return purged
+
+
+_storage = None
+
+
+def content_addressed_storage():
+    global _storage
+    if _storage is None:
+        _storage = ContentAddressedStorage()
+    return _storage
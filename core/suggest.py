@@ -0,0 +1,208 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .search import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class PrefixIndex:
+    """
+    Typeahead uchun in-process prefix indeks: saralangan (key, ...) ro'yxatlari
+    ustida bisect. Har bir title uchun har bir so'zdan boshlanadigan suffix
+    kalit sifatida saqlanadi, shuning uchun "shar" -> "Olma sharbati" topiladi.
+
+    Kalitlar tartib guruhlariga (TIERS) bo'lingan: title boshidan mos kelgan
+    kategoriyalar, title boshidan mos kelgan mahsulotlar, keyin title o'rtasidan
+    mos kelganlar. Har bir guruh ichida natijalar kalit (alifbo) tartibida, shuning
+    uchun suggest() `limit` ta natija yig'ilishi bilan to'xtaydi - qisqa prefiks
+    uchun ham natijalar kesilmaydi va butun moslik diapazoni ko'rib chiqilmaydi.
+
+    Indeks process ishga tushganda (config.wsgi/asgi) fonda quriladi, keyin
+    Product/Category saqlanganda inkremental yangilanadi (core.signals). Boshqa
+    worker processlardagi o'zgarishlar SUGGEST_INDEX_TTL soniyadan keyin fondagi
+    to'liq qayta qurish bilan yetib keladi: shu orada so'rovlarga eski indeks
+    javob beradi, yangisi tayyor bo'lgach bir lock ostida almashtiriladi va qurish
+    davomida kelgan update/remove lar unga qayta qo'llanadi.
+    """
+    # (title o'rtasidanmi, mahsulotmi) - kichigi birinchi
+    TIERS = ((False, False), (False, True), (True, False), (True, True))
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, "SUGGEST_INDEX_TTL", 300)
+        self._lock = threading.Lock()
+        # qayta qurishni faqat bitta thread bajaradi (build davomida _lock band qilinmaydi)
+        self._build_lock = threading.Lock()
+        self._tiers = {tier: [] for tier in self.TIERS}
+        self._keys_by_item = {}
+        self._built_at = None
+        # build() database ni o'qiyotganda kelgan (kind, pk, title, slug) lar - almashtirishdan keyin qo'llanadi
+        self._pending = None
+        # invalidate() soni: qurish davomida invalidate bo'lsa yangi indeks ham eskirgan hisoblanadi
+        self._generation = 0
+        self._executor = None
+        # gunicorn --preload: master dagi fon qurilishi lock ni band qilgan holda fork bo'lishi mumkin
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._pending = None
+        self._executor = None
+
+    @staticmethod
+    def keys_for(title):
+        tokens = tokenize(title)
+        return [(" ".join(tokens[position:]), position) for position in range(len(tokens))]
+
+    @staticmethod
+    def tier_of(entry):
+        _, position, kind, *_ = entry
+        return (position > 0, kind != "category")
+
+    def _add(self, kind, pk, title, slug):
+        keys = []
+        for key, position in self.keys_for(title):
+            entry = (key, position, kind, pk, title, slug)
+            insort(self._tiers[self.tier_of(entry)], entry)
+            keys.append(entry)
+        self._keys_by_item[(kind, pk)] = keys
+
+    def _remove(self, kind, pk):
+        for entry in self._keys_by_item.pop((kind, pk), ()):
+            entries = self._tiers[self.tier_of(entry)]
+            index = bisect_left(entries, entry)
+            if index < len(entries) and entries[index] == entry:
+                del entries[index]
+
+    def build(self):
+        from .models import Category, Product
+
+        with self._lock:
+            self._pending = []
+            generation = self._generation
+        tiers = {tier: [] for tier in self.TIERS}
+        keys_by_item = {}
+        sources = (
+            ("category", Category.objects.values_list("id", "title", "slug")),
+            ("product", Product.objects.values_list("id", "title", "slug")),
+        )
+        try:
+            for kind, rows in sources:
+                for pk, title, slug in rows.iterator(chunk_size=2000):
+                    keys = [(key, position, kind, pk, title, slug) for key, position in self.keys_for(title)]
+                    for entry in keys:
+                        tiers[self.tier_of(entry)].append(entry)
+                    keys_by_item[(kind, pk)] = keys
+            for entries in tiers.values():
+                entries.sort()
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            self._tiers = tiers
+            self._keys_by_item = keys_by_item
+            # o'qilgan snapshot dan keyingi o'zgarishlar yo'qolmasin (update/remove idempotent)
+            for kind, pk, title, slug in self._pending:
+                self._remove(kind, pk)
+                if title is not None:
+                    self._add(kind, pk, title, slug)
+            self._pending = None
+            self._built_at = time.monotonic() if generation == self._generation else float("-inf")
+
+    def is_stale(self):
+        return self._built_at is None or time.monotonic() - self._built_at > self.ttl
+
+    def ensure_built(self):
+        if not self.is_stale():
+            return
+        if self._built_at is not None:
+            # eskirgan: fonda qayta quriladi, so'rovga eski indeks javob beradi
+            self.rebuild_in_background()
+            return
+        # indeks hali yo'q - birinchi qurilishni kutamiz
+        with self._build_lock:
+            if self._built_at is None:
+                self.build()
+
+    def rebuild_in_background(self):
+        # bir vaqtda bitta qayta qurish; lock fon threadida bo'shatiladi
+        if not self._build_lock.acquire(blocking=False):
+            return None
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="suggest-index")
+        return self._executor.submit(self._rebuild)
+
+    def _rebuild(self):
+        close_old_connections()
+        try:
+            self.build()
+        except Exception:
+            logger.exception("Suggest indeksini qurib bo'lmadi")
+        finally:
+            self._build_lock.release()
+            close_old_connections()
+
+    def invalidate(self):
+        # signalsiz bulk yozuvlardan keyin: indeks fonda qaytadan quriladi
+        with self._lock:
+            self._generation += 1
+            if self._built_at is None:
+                return
+            self._built_at = float("-inf")
+        self.rebuild_in_background()
+
+    def update(self, kind, pk, title, slug):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((kind, pk, title, slug))
+            if self._built_at is None:
+                return
+            self._remove(kind, pk)
+            self._add(kind, pk, title, slug)
+
+    def remove(self, kind, pk):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((kind, pk, None, None))
+            if self._built_at is None:
+                return
+            self._remove(kind, pk)
+
+    def suggest(self, text, limit=10):
+        prefix = " ".join(tokenize(text))
+        if not prefix:
+            return []
+        self.ensure_built()
+
+        results = []
+        seen = set()
+        tiers = self._tiers
+        for tier in self.TIERS:
+            entries = tiers[tier]
+            index = bisect_left(entries, (prefix,))
+            while len(results) < limit and index < len(entries):
+                key, _, kind, pk, title, slug = entries[index]
+                index += 1
+                if not key.startswith(prefix):
+                    break
+                # bitta title bir nechta so'zidan mos kelishi mumkin - eng yaxshi guruhdagisi qoladi
+                if (kind, pk) in seen:
+                    continue
+                seen.add((kind, pk))
+                results.append({"type": kind, "id": pk, "title": title, "slug": slug})
+            if len(results) >= limit:
+                break
+        return results
+
+
+suggest_index = PrefixIndex()
@@ -1,3 +1,1063 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import CachedJWTAuthentication
+from .catalog_import import CatalogImportError, import_catalog
+from .checkout import CheckoutError, checkout_cart
+from .exports import CHUNK_SIZE, ExportError, export_queryset, iter_export, parse_bound, parse_statuses
+from .images import delete_derivatives, generate_derivatives, needs_derivatives, store_derivatives
+from .models import (
+    Cart, CartItem, Category, CommentImageUpload, Order, OrderItem, Product, ProductComment, ProductCommentImage,
+    ProductImage, StoredFile, User, Verification,
+)
+from .reservations import ReservationError, release_expired, reservation_ttl, reserve_cart
+from .storage import content_addressed_storage
+from .suggest import PrefixIndex
+from .throttling import SlidingWindowThrottle
+from .uploads import process_upload
+
+
+# ------------------ QUERY COUNTS ------------------
+def build_catalog(category_title, size):
+    """`size` ta mahsulot, har birida 2 ta rasm va 2 ta comment (har birida 1 ta rasm)."""
+    category = Category.objects.create(title=category_title)
+    # bulk_create signal yubormaydi - faqat o'lchanadigan o'qishlar qoladi
+    products = Product.objects.bulk_create([
+        Product(
+            category=category, title=f"{category_title} {n}", slug=f"{category_title.lower()}-{n}",
+            description="", price=10, count=5, image=f"products/main/{n}.jpg",
+        )
+        for n in range(size)
+    ])
+    ProductImage.objects.bulk_create([
+        ProductImage(product=product, image=f"products/gallery/{product.pk}-{n}.jpg")
+        for product in products for n in range(2)
+    ])
+    comments = ProductComment.objects.bulk_create([
+        ProductComment(product=product, user=f"user{n}", rating=5, comment_text="Zo'r")
+        for product in products for n in range(2)
+    ])
+    ProductCommentImage.objects.bulk_create([
+        ProductCommentImage(comment=comment, image=f"products/comments/{comment.pk}.jpg") for comment in comments
+    ])
+    return category, products
+
+
+class ProductQueryCountTests(TestCase):
+    """
+    Product list/retrieve so'rovlari soni katalog hajmiga bog'liq bo'lmasligi kerak
+    (N+1 regressiyasi CI da yiqiladi). Ikkala katalog uchun bir xil aniq son tekshiriladi.
+    """
+    # product + images + comments + comment images (to'liq javob)
+    FULL_QUERIES = 4
+    # ?fields= bilan nested relationlar o'qilmaydi
+    SPARSE_QUERIES = 1
+    # ?fields=title&expand=images - product + images
+    EXPANDED_QUERIES = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalogs = [build_catalog("Kichik", 2), build_catalog("Katta", 15)]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def assertQueries(self, url, expected_queries):
+        for category, products in self.catalogs:
+            with self.subTest(size=len(products)):
+                # response cache dan emas, har safar database dan qurilsin
+                cache.clear()
+                with self.assertNumQueries(expected_queries):
+                    response = self.client.get(url.format(category=category.pk, product=products[-1].pk))
+                self.assertEqual(response.status_code, 200)
+
+    def test_list(self):
+        self.assertQueries("/api/products/?category_id={category}", self.FULL_QUERIES)
+
+    def test_list_sparse(self):
+        self.assertQueries("/api/products/?category_id={category}&fields=title,price", self.SPARSE_QUERIES)
+
+    def test_list_expand(self):
+        self.assertQueries("/api/products/?category_id={category}&fields=title&expand=images", self.EXPANDED_QUERIES)
+
+    def test_summary(self):
+        self.assertQueries("/api/products/summary/?category_id={category}", self.SPARSE_QUERIES)
+
+    def test_retrieve(self):
+        self.assertQueries("/api/products/{product}/", self.FULL_QUERIES)
+
+    def test_retrieve_expand(self):
+        self.assertQueries("/api/products/{product}/?fields=title&expand=images", self.EXPANDED_QUERIES)
+
+    def test_list_renders_every_product_of_the_category(self):
+        for category, products in self.catalogs:
+            response = self.client.get(f"/api/products/?category_id={category.pk}")
+            self.assertEqual(len(response.data["results"]), len(products))
+            first = response.data["results"][0]
+            self.assertEqual(len(first["images"]), 2)
+            self.assertEqual(len(first["comments"][0]["images"]), 1)
+
+
+# ------------------ CHECKOUT ------------------
+class CheckoutConcurrencyTests(TransactionTestCase):
+    """Cheklangan stockga bir vaqtda ko'p checkout - oversell bo'lmasligi kerak."""
+    STOCK = 5
+    CARTS = 12
+    RESERVED_CARTS = 3
+
+    def setUp(self):
+        self.product = Product.objects.create(title="Tanqis mahsulot", description="", price=10, count=self.STOCK)
+        self.carts = [Cart.objects.create() for _ in range(self.CARTS)]
+        for cart in self.carts:
+            CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+        # bir qismi band qilingan - checkout o'z reservationini bo'shatib sotadi
+        for cart in self.carts[:self.RESERVED_CARTS]:
+            reserve_cart(cart.pk)
+
+    def test_concurrent_checkouts_do_not_oversell(self):
+        barrier = threading.Barrier(self.CARTS)
+        outcomes = []
+
+        def checkout(cart_id):
+            try:
+                barrier.wait()
+                checkout_cart(cart_id, phone_number="+998900000000")
+                outcomes.append("ok")
+            except CheckoutError:
+                outcomes.append("sold out")
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout, args=(cart.pk,)) for cart in self.carts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.product.refresh_from_db()
+        self.assertEqual(len(outcomes), self.CARTS)
+        self.assertEqual(outcomes.count("ok"), self.STOCK)
+        self.assertEqual(Order.objects.count(), self.STOCK)
+        self.assertGreaterEqual(self.product.count, 0)
+        self.assertEqual(self.product.count, 0)
+        self.assertEqual(self.product.reserved_count, 0)
+        self.assertEqual(Cart.objects.filter(is_active=False).count(), self.STOCK)
+
+
+# ------------------ RESERVATIONS ------------------
+class ProductAvailabilityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.product = Product.objects.create(title="Tanqis mahsulot", description="", price=10, count=5)
+        self.cart = Cart.objects.create()
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=2)
+
+    def test_availability_follows_reservations_without_cache_bump(self):
+        detail = self.client.get(f"/api/products/{self.product.pk}/")
+        self.assertNotIn("reserved_count", detail.data)
+        self.assertNotIn("available_count", detail.data)
+
+        url = f"/api/products/availability/?ids={self.product.pk}"
+        self.assertEqual(self.client.get(url).data["results"], [{"id": self.product.pk, "available_count": 5}])
+        reserve_cart(self.cart.pk)
+        self.assertEqual(self.client.get(url).data["results"], [{"id": self.product.pk, "available_count": 3}])
+
+    def test_rejects_invalid_ids(self):
+        self.assertEqual(self.client.get("/api/products/availability/?ids=1,abc").status_code, 400)
+        self.assertEqual(self.client.get("/api/products/availability/").status_code, 400)
+
+
+class CartReservationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.product = Product.objects.create(title="Band mahsulot", description="", price=10, count=5)
+        self.cart = Cart.objects.create()
+        self.item = CartItem.objects.create(cart=self.cart, product=self.product, quantity=2)
+        reserve_cart(self.cart.pk)
+
+    def assertReserved(self, reserved_count, item_reserved):
+        self.product.refresh_from_db()
+        self.item.refresh_from_db()
+        self.assertEqual(self.product.reserved_count, reserved_count)
+        self.assertEqual(self.item.reserved_quantity, item_reserved)
+
+    def test_reserve_holds_stock_until_ttl(self):
+        self.assertReserved(2, 2)
+        self.assertGreater(self.item.reserved_until, timezone.now() + reservation_ttl() - timedelta(minutes=1))
+
+    def test_re_reserve_after_quantity_change_holds_only_the_difference(self):
+        CartItem.objects.filter(pk=self.item.pk).update(quantity=4)
+        reserve_cart(self.cart.pk)
+        self.assertReserved(4, 4)
+
+        CartItem.objects.filter(pk=self.item.pk).update(quantity=1)
+        reserve_cart(self.cart.pk)
+        self.assertReserved(1, 1)
+
+    def test_reserve_without_enough_stock_holds_nothing(self):
+        other = Cart.objects.create()
+        CartItem.objects.create(cart=other, product=self.product, quantity=4)
+        with self.assertRaises(ReservationError):
+            reserve_cart(other.pk)
+        self.assertReserved(2, 2)
+        self.assertEqual(other.items.get().reserved_quantity, 0)
+
+    def test_bulk_items_lowering_quantity_releases_excess(self):
+        response = self.client.post(
+            f"/api/carts/{self.cart.pk}/items/", [{"product": self.product.pk, "quantity": 1}], format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertReserved(1, 1)
+        self.assertEqual(self.product.available_count, 4)
+
+    def test_cart_item_update_lowering_quantity_releases_excess(self):
+        response = self.client.patch(f"/api/cart-items/{self.item.pk}/", {"quantity": 1}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertReserved(1, 1)
+
+    def test_bulk_items_removing_item_releases_reservation(self):
+        self.client.post(f"/api/carts/{self.cart.pk}/items/", [{"product": self.product.pk, "quantity": 0}], format="json")
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.reserved_count, 0)
+
+
+class ReleaseExpiredTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(title="Band mahsulot", description="", price=10, count=50)
+        self.carts = [Cart.objects.create() for _ in range(6)]
+        for cart in self.carts:
+            CartItem.objects.create(cart=cart, product=self.product, quantity=2)
+            reserve_cart(cart.pk)
+        self.expired_at = timezone.now() + reservation_ttl() + timedelta(seconds=1)
+
+    def test_sweeps_each_batch_with_two_writes(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(release_expired(batch_size=3, now=self.expired_at), 6)
+        # har bir batch: bitta CartItem UPDATE + bitta Product UPDATE
+        updates = [query["sql"] for query in queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 2 * 2)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.reserved_count, 0)
+        self.assertFalse(CartItem.objects.filter(reserved_quantity__gt=0).exists())
+
+    def test_keeps_unexpired_reservations(self):
+        self.assertEqual(release_expired(now=timezone.now()), 0)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.reserved_count, 12)
+
+    def test_is_idempotent(self):
+        self.assertEqual(release_expired(now=self.expired_at), 6)
+        self.assertEqual(release_expired(now=self.expired_at), 0)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.reserved_count, 0)
+
+    def test_command_releases_expired(self):
+        CartItem.objects.filter(cart__in=self.carts[:4]).update(reserved_until=timezone.now() - timedelta(seconds=1))
+        output = io.StringIO()
+        call_command("release_expired_reservations", stdout=output)
+        self.assertIn("4 ta reservation", output.getvalue())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.reserved_count, 4)
+
+
+# ------------------ RATING AGGREGATES ------------------
+class ProductRatingTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(title="Olma", description="", price=1)
+        self.other = Product.objects.create(title="Nok", description="", price=1)
+
+    def comment(self, rating, product=None):
+        return ProductComment.objects.create(product=product or self.product, user="mehmon", rating=rating, comment_text="")
+
+    def ratings(self, product=None):
+        product = product or self.product
+        product.refresh_from_db()
+        return (
+            product.rating_count, product.rating_sum, product.rating_avg,
+            [getattr(product, f"rating_{star}") for star in range(1, 6)],
+        )
+
+    def test_comments_update_aggregates_incrementally(self):
+        self.comment(5)
+        comment = self.comment(2)
+        self.assertEqual(self.ratings(), (2, 7, 3.5, [0, 1, 0, 0, 1]))
+
+        comment.rating = 4
+        comment.save()
+        self.assertEqual(self.ratings(), (2, 9, 4.5, [0, 0, 0, 1, 1]))
+
+        comment.product = self.other
+        comment.save()
+        self.assertEqual(self.ratings(), (1, 5, 5.0, [0, 0, 0, 0, 1]))
+        self.assertEqual(self.ratings(self.other), (1, 4, 4.0, [0, 0, 0, 1, 0]))
+
+        comment.delete()
+        self.assertEqual(self.ratings(self.other), (0, 0, 0.0, [0, 0, 0, 0, 0]))
+
+    def test_stale_product_save_keeps_counters(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        self.comment(3)
+        stale.price = 2
+        stale.save()
+        self.assertEqual(self.ratings()[:2], (1, 3))
+        self.assertEqual(self.product.price, 2)
+
+    def test_deferred_product_save_writes_only_loaded_fields(self):
+        self.comment(4)
+        product = Product.objects.only("id", "title", "price").get(pk=self.product.pk)
+        product.price = 3
+        with CaptureQueriesContext(connection) as queries:
+            product.save()
+        [update] = [query["sql"] for query in queries if query["sql"].startswith('UPDATE "core_product"')]
+        self.assertNotIn("rating", update)
+        self.assertNotIn("description", update)
+        self.assertEqual(self.ratings()[:2], (1, 4))
+
+    def test_rebuild_command_recomputes_aggregates(self):
+        self.comment(5)
+        self.comment(1, product=self.other)
+        Product.objects.update(rating_count=9, rating_sum=9, rating_avg=1, rating_5=9)
+        call_command("rebuild_product_ratings", stdout=io.StringIO())
+        self.assertEqual(self.ratings(), (1, 5, 5.0, [0, 0, 0, 0, 1]))
+        self.assertEqual(self.ratings(self.other), (1, 1, 1.0, [1, 0, 0, 0, 0]))
+
+
+# ------------------ SPARSE FIELDSETS ------------------
+class SparseFieldsetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category, cls.products = build_catalog("Mevalar", 1)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = f"/api/products/{self.products[0].pk}/"
+
+    def keys(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return set(response.data)
+
+    def test_fields_limits_response_and_ignores_unknown_names(self):
+        self.assertEqual(self.keys(self.url, fields="title,price,yo'q"), {"title", "price"})
+
+    def test_expand_adds_nested_relations(self):
+        self.assertEqual(self.keys(self.url, fields="title", expand="images"), {"title", "images"})
+        expanded = self.keys(self.url, expand="comments")
+        self.assertIn("comments", expanded)
+        self.assertNotIn("images", expanded)
+        self.assertIn("description", expanded)
+
+    def test_full_response_without_parameters(self):
+        self.assertTrue({"title", "description", "images", "comments", "image_variants"} <= self.keys(self.url))
+
+    def test_summary_has_only_grid_fields(self):
+        response = self.client.get("/api/products/summary/", {"category_id": self.category.pk})
+        self.assertEqual(set(response.data["results"][0]), {
+            "id", "category", "title", "slug", "price", "discount_price", "image", "image_variants",
+            "rating_avg", "rating_count",
+        })
+
+    def test_writes_ignore_fields_parameter(self):
+        self.client.force_authenticate(User.objects.create(phone_number="+998900000004", is_staff=True))
+        response = self.client.patch(f"{self.url}?fields=title", {"price": "12.00"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("price", response.data)
+        self.assertIn("description", response.data)
+
+    def test_narrowed_queryset_cursor_pages_do_not_load_deferred_fields(self):
+        Product.objects.bulk_create([
+            Product(category=self.category, title=f"Meva {n}", slug=f"meva-{n}", description="", price=n)
+            for n in range(4)
+        ])
+        url = f"/api/products/?category_id={self.category.pk}&fields=price&ordering=price&page_size=2"
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(response.data["next"])
+        self.assertEqual([set(product) for product in response.data["results"]], [{"price"}, {"price"}])
+
+
+# ------------------ SEARCH ------------------
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        for title, description in [
+            ("Olma sharbati", "Tabiiy sharbat"),
+            ("Nok sharbati", "Tabiiy sharbat"),
+            ("Qora choy", "Olma ta'mi bilan"),
+            ("Guruch", "Lazer"),
+        ]:
+            Product.objects.create(title=title, description=description, price=1)
+
+    def search(self, text, **params):
+        response = self.client.get("/api/products/", {"search": text, "fields": "title", **params})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def titles(self, text):
+        return [product["title"] for product in self.search(text).data["results"]]
+
+    def test_prefix_terms_match_and_title_matches_rank_first(self):
+        self.assertEqual(self.titles("olm"), ["Olma sharbati", "Qora choy"])
+        self.assertEqual(self.titles("olm shar"), ["Olma sharbati"])
+        self.assertEqual(self.titles("!!!"), [])
+
+    def test_index_follows_product_saves_and_deletes(self):
+        product = Product.objects.get(title="Guruch")
+        self.assertEqual(self.titles("guruch"), ["Guruch"])
+        # response cache versiyasi commit dan keyin oshadi
+        with self.captureOnCommitCallbacks(execute=True):
+            product.title = "Bug'doy"
+            product.save()
+        self.assertEqual(self.titles("guruch"), [])
+        self.assertEqual(self.titles("bug"), ["Bug'doy"])
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        self.assertEqual(self.titles("bug"), [])
+
+    def test_search_rank_cursor_pagination_visits_every_match_once(self):
+        # bir xil rank li ko'p natija: tartib id tie-breaker bilan barqaror
+        Product.objects.bulk_create([
+            Product(title=f"Sharbat {n:02d}", slug=f"sharbat-{n:02d}", description="", price=1) for n in range(23)
+        ])
+        call_command("rebuild_search_index", stdout=io.StringIO())
+        expected = set(Product.objects.filter(title__icontains="sharbat").values_list("title", flat=True))
+
+        seen = []
+        response = self.search("sharbat", page_size=5)
+        while True:
+            seen += [product["title"] for product in response.data["results"]]
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+        self.assertEqual(len(seen), len(expected))
+        self.assertEqual(set(seen), expected)
+
+
+# ------------------ SUGGEST ------------------
+class PrefixIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Category.objects.create(title="Oshxona")
+        # bulk_create signal yubormaydi - indeks faqat build() dan quriladi
+        Product.objects.bulk_create(
+            [Product(title=f"Zira olma {n:03d}", slug=f"zira-olma-{n:03d}", description="", price=1) for n in range(600)]
+            + [Product(title="Osh", slug="osh", description="", price=1)]
+        )
+
+    def setUp(self):
+        self.index = PrefixIndex(ttl=60)
+
+    def test_title_start_matches_are_not_cut_off_by_many_mid_title_matches(self):
+        # "olma ..." kalitlari (600 ta) "osh" dan oldin saralanadi
+        results = self.index.suggest("o", limit=5)
+        self.assertEqual(
+            [(r["type"], r["title"]) for r in results[:2]], [("category", "Oshxona"), ("product", "Osh")]
+        )
+        self.assertEqual(len(results), 5)
+
+    def test_returns_limit_results_for_short_prefix(self):
+        results = self.index.suggest("ol", limit=50)
+        self.assertEqual(len(results), 50)
+        self.assertEqual(len({r["id"] for r in results}), 50)
+
+    def test_stale_index_is_rebuilt_once_in_background(self):
+        self.index.build()
+        self.index._built_at -= 120
+        finish = threading.Event()
+
+        def slow_build():
+            # database ga tegmaydi: test tranzaksiyasi fon threadiga ko'rinmaydi
+            finish.wait(5)
+            self.index._built_at = time.monotonic()
+
+        with mock.patch.object(self.index, "build", side_effect=slow_build) as build:
+            # qayta qurish tugashini kutmasdan eski indeks javob beradi
+            for _ in range(8):
+                self.assertEqual([r["title"] for r in self.index.suggest("osh")], ["Oshxona", "Osh"])
+            finish.set()
+            self.index._executor.shutdown(wait=True)
+        self.assertEqual(build.call_count, 1)
+        self.assertFalse(self.index.is_stale())
+
+    def test_updates_during_build_are_replayed(self):
+        product = Product.objects.get(slug="osh")
+        keys_for = PrefixIndex.keys_for
+        renamed = []
+
+        def keys_for_with_concurrent_update(title):
+            # database o'qilayotganda signal keladi: snapshot da hali eski nom
+            if not renamed:
+                renamed.append(title)
+                self.index.update("product", product.pk, "Palov", "palov")
+            return keys_for(title)
+
+        with mock.patch.object(self.index, "keys_for", side_effect=keys_for_with_concurrent_update):
+            self.index.build()
+        self.assertEqual([r["id"] for r in self.index.suggest("palov")], [product.pk])
+        self.assertEqual([r["title"] for r in self.index.suggest("osh")], ["Oshxona"])
+
+
+# ------------------ THROTTLING ------------------
+@mock.patch.object(SlidingWindowThrottle, "THROTTLE_RATES", {"register_phone": "3/hour", "register_ip": "2/hour"})
+class RegisterThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def register(self, phone, ip):
+        return self.client.post("/api/register/", {"phone_number": phone}, REMOTE_ADDR=ip)
+
+    def test_ip_rejection_does_not_count_against_phone(self):
+        for n in range(2):
+            self.assertEqual(self.register(f"+99890000000{n}", "10.0.0.1").status_code, 201)
+        # IP limiti tugagan - qurbon raqami bilan urinishlar rad etiladi...
+        for _ in range(5):
+            self.assertEqual(self.register("+998901234567", "10.0.0.1").status_code, 429)
+        # ...lekin raqamning o'z limitini yemaydi
+        for n in range(3):
+            self.assertEqual(self.register("+998901234567", f"10.0.1.{n}").status_code, 201)
+        self.assertEqual(self.register("+998901234567", "10.0.2.1").status_code, 429)
+
+
+class SlowReadCache:
+    """O'qishdan keyin kechikadigan cache: tekshiruv va yozish orasidagi poyga oynasini kengaytiradi."""
+
+    def __init__(self, backend, delay=0.05):
+        self.backend = backend
+        self.delay = delay
+
+    def get(self, *args, **kwargs):
+        value = self.backend.get(*args, **kwargs)
+        time.sleep(self.delay)
+        return value
+
+    def get_many(self, *args, **kwargs):
+        values = self.backend.get_many(*args, **kwargs)
+        time.sleep(self.delay)
+        return values
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+@mock.patch.object(SlidingWindowThrottle, "THROTTLE_RATES", {"register_phone": "3/hour", "register_ip": "100/hour"})
+class ConcurrentRegisterThrottleTests(TransactionTestCase):
+    ATTEMPTS = 12
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(SlidingWindowThrottle, "cache", SlowReadCache(cache))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_parallel_burst_does_not_exceed_phone_limit(self):
+        barrier = threading.Barrier(self.ATTEMPTS)
+        statuses = []
+
+        def register(n):
+            try:
+                barrier.wait()
+                response = APIClient().post(
+                    "/api/register/", {"phone_number": "+998901234567"}, REMOTE_ADDR=f"10.0.0.{n}"
+                )
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=register, args=(n,)) for n in range(self.ATTEMPTS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(statuses), self.ATTEMPTS)
+        self.assertEqual(statuses.count(201), 3)
+        self.assertEqual(statuses.count(429), self.ATTEMPTS - 3)
+        self.assertEqual(Verification.objects.count(), 3)
+
+
+# ------------------ JWT AUTH ------------------
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(phone_number="+998901112233", first_name="Ali", is_staff=True)
+        self.token = AccessToken.for_user(self.user)
+        self.authentication = CachedJWTAuthentication()
+
+    def test_principal_is_served_from_cache(self):
+        self.authentication.get_user(self.token)
+        with self.assertNumQueries(0):
+            user = self.authentication.get_user(self.token)
+        self.assertEqual((user.pk, user.phone_number, user.is_staff), (self.user.pk, "+998901112233", True))
+
+    def test_user_save_invalidates_cached_principal(self):
+        self.authentication.get_user(self.token)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(self.token)
+
+    def test_user_delete_invalidates_cached_principal(self):
+        self.authentication.get_user(self.token)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(self.token)
+
+
+# ------------------ RESPONSE CACHE ------------------
+class VersionedCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = Category.objects.create(title="Ichimliklar")
+        self.product = Product.objects.create(
+            title="Olma sharbati", description="", price=10, count=3, category=self.category
+        )
+        self.url = f"/api/products/{self.product.pk}/?fields=title,category"
+
+    def test_unchanged_response_is_not_modified(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first["ETag"])
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 304)
+
+    def test_product_save_invalidates_response(self):
+        first = self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.title = "Nok sharbati"
+            self.product.save()
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second.data["title"], "Nok sharbati")
+
+    def test_category_delete_invalidates_product_responses(self):
+        self.assertEqual(self.client.get(self.url).data["category"], self.category.pk)
+        list_url = f"/api/products/?category_id={self.category.pk}"
+        self.assertEqual(len(self.client.get(list_url).data["results"]), 1)
+
+        # Product.category SET_NULL bilan bulk UPDATE qilinadi - Product signali yo'q
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+
+        self.assertIsNone(self.client.get(self.url).data["category"])
+        self.assertEqual(self.client.get(list_url).data["results"], [])
+
+
+class VersionedCacheReplicaTests(TransactionTestCase):
+    # TestCase tranzaksiyasi ichida router baribir primary ni tanlaydi
+    def setUp(self):
+        cache.clear()
+        Category.objects.create(title="Mevalar")
+
+    def test_cache_miss_is_built_from_primary(self):
+        # replica dan o'qilsa ConnectionDoesNotExist - javob faqat primary dan qurilishi mumkin
+        with mock.patch("core.routers.replica_aliases", return_value=("replica_missing",)):
+            response = APIClient().get("/api/categories/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["title"], "Mevalar")
+
+
+# ------------------ CONTENT-ADDRESSED MEDIA ------------------
+def image_upload(color, name="rasm.png"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), color).save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class TempMediaRootMixin:
+    """Har bir test uchun alohida MEDIA_ROOT (haqiqiy media/ ga yozilmaydi)."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class StoredFileRefcountTests(TempMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.storage = content_addressed_storage()
+        # derivativelar fon threadida yaratiladi - test uchun kerak emas
+        patcher = mock.patch("core.signals.schedule_derivatives")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reference_is_recorded_only_for_saved_rows(self):
+        first = Category.objects.create(title="Birinchi", image=image_upload("red"))
+        Category.objects.create(title="Ikkinchi", image=image_upload("red"))
+        self.assertEqual(StoredFile.objects.get(name=first.image.name).refcount, 2)
+
+        # fayl yuklanadi, lekin qator saqlanmaydi (unique title)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Category.objects.create(title="Birinchi", image=image_upload("red"))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Category.objects.create(title="Birinchi", image=image_upload("blue"))
+
+        self.assertEqual(StoredFile.objects.get(name=first.image.name).refcount, 2)
+        self.assertEqual(StoredFile.objects.count(), 1)
+
+    def test_purge_removes_only_unreferenced_files_after_grace(self):
+        kept = Category.objects.create(title="Saqlangan", image=image_upload("red"))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Category.objects.create(title="Saqlangan", image=image_upload("blue"))
+        orphan = self.storage.hashed_name("x.png", image_upload("blue"))
+        self.assertTrue(self.storage.exists(orphan))
+
+        self.assertEqual(self.storage.purge_orphans(), 0)
+        later = time.time() + self.storage.grace_seconds + 1
+        self.assertEqual(self.storage.purge_orphans(now=later), 1)
+        self.assertFalse(self.storage.exists(orphan))
+        self.assertTrue(self.storage.exists(kept.image.name))
+
+
+# ------------------ IMAGE DERIVATIVES ------------------
+class ImageDerivativeTests(TempMediaRootMixin, TestCase):
+    def save_source(self, name, mode, size, image_format):
+        buffer = io.BytesIO()
+        Image.new(mode, size).save(buffer, format=image_format)
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def test_generates_resized_fallback_and_webp_variants(self):
+        source = self.save_source("products/main/olma.jpg", "RGB", (1000, 500), "JPEG")
+        variants = generate_derivatives(source)
+        self.assertEqual(variants["source"], source)
+        self.assertEqual(
+            {variant: (data["width"], data["height"]) for variant, data in variants.items() if variant != "source"},
+            {"thumb": (200, 100), "medium": (600, 300), "large": (1000, 500)},
+        )
+        self.assertEqual(variants["thumb"]["name"], "products/main/derived/olma_thumb.jpg")
+        with default_storage.open(variants["thumb"]["webp"], "rb") as file:
+            self.assertEqual(Image.open(file).format, "WEBP")
+
+        delete_derivatives(variants)
+        self.assertFalse(default_storage.exists(variants["thumb"]["name"]))
+        self.assertTrue(default_storage.exists(source))
+
+    def test_transparent_source_keeps_png_fallback(self):
+        source = self.save_source("products/main/logo.png", "RGBA", (300, 300), "PNG")
+        self.assertTrue(generate_derivatives(source)["thumb"]["name"].endswith("_thumb.png"))
+
+    def test_result_for_replaced_image_is_not_stored(self):
+        category = Category.objects.create(title="Mevalar")
+        Category.objects.filter(pk=category.pk).update(image="categories/yangi.jpg")
+        store_derivatives(Category, category.pk, "categories/eski.jpg", {"source": "categories/eski.jpg"})
+        category.refresh_from_db()
+        self.assertEqual(category.image_variants, {})
+
+        store_derivatives(Category, category.pk, "categories/yangi.jpg", {"source": "categories/yangi.jpg"})
+        category.refresh_from_db()
+        self.assertFalse(needs_derivatives(category))
+
+    def test_saving_a_new_image_schedules_derivatives_after_commit(self):
+        with mock.patch("core.signals.schedule_derivatives") as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                category = Category.objects.create(title="Mevalar", image=image_upload("red"))
+            self.assertEqual([call.args[0].pk for call in schedule.call_args_list], [category.pk])
+
+            Category.objects.filter(pk=category.pk).update(image_variants={"source": category.image.name})
+            category.refresh_from_db()
+            with self.captureOnCommitCallbacks(execute=True):
+                category.title = "Meva"
+                category.save()
+            self.assertEqual(schedule.call_count, 1)
+
+    def test_variants_are_rendered_as_urls(self):
+        category = Category.objects.create(title="Mevalar")
+        variants = {
+            "source": "categories/olma.jpg",
+            "thumb": {
+                "name": "categories/derived/olma_thumb.jpg", "webp": "categories/derived/olma_thumb.webp",
+                "width": 200, "height": 100,
+            },
+        }
+        Category.objects.filter(pk=category.pk).update(image_variants=variants)
+        cache.clear()
+        data = APIClient().get(f"/api/categories/{category.pk}/").data["image_variants"]
+        self.assertEqual(list(data), ["thumb"])
+        self.assertEqual(data["thumb"]["webp"], "http://testserver/media/categories/derived/olma_thumb.webp")
+
+
+# ------------------ COMMENT UPLOADS ------------------
+def jpeg_upload(size, exif=None, name="rasm.jpg"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "green").save(buffer, format="JPEG", exif=exif or Image.Exif())
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+class CommentImageUploadTests(TempMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        product = Product.objects.create(title="Olma", description="", price=1)
+        self.comment = ProductComment.objects.create(product=product, user="mehmon", rating=5, comment_text="")
+        patcher = mock.patch("core.signals.schedule_derivatives")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self, file):
+        with mock.patch("core.views.enqueue") as enqueue, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/product-comment-images/", {"comment": self.comment.pk, "image": file}, format="multipart"
+            )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], "pending")
+        [call] = enqueue.call_args_list
+        self.assertEqual(call.args[0].pk, response.data["id"])
+        return CommentImageUpload.objects.get(pk=response.data["id"])
+
+    def test_upload_is_queued_and_processed_without_exif(self):
+        exif = Image.Exif()
+        exif[0x010F] = "Kamera"
+        # 6 - 90 gradusga burilgan: orientatsiya pikselga qo'llanadi
+        exif[0x0112] = 6
+        job = self.upload(jpeg_upload((3000, 1500), exif))
+
+        job = process_upload(job.pk)
+        self.assertEqual((job.status, job.error), ("done", ""))
+        self.assertFalse(job.staged_file)
+        with job.result.image.open("rb") as file:
+            image = Image.open(file)
+            self.assertEqual(image.size, (1024, 2048))
+            self.assertEqual(dict(image.getexif()), {})
+        response = self.client.get(f"/api/comment-image-uploads/{job.pk}/")
+        self.assertEqual(response.data["result"]["id"], job.result.pk)
+
+    def test_invalid_image_fails_and_staged_file_is_removed(self):
+        job = self.upload(SimpleUploadedFile("rasm.jpg", b"rasm emas", content_type="image/jpeg"))
+        staged = job.staged_file.name
+        job = process_upload(job.pk)
+        self.assertEqual(job.status, "failed")
+        self.assertTrue(job.error.startswith("Yaroqsiz rasm"))
+        self.assertFalse(default_storage.exists(staged))
+        self.assertFalse(ProductCommentImage.objects.exists())
+
+    def test_job_is_processed_once(self):
+        job = self.upload(jpeg_upload((10, 10)))
+        self.assertIsNotNone(process_upload(job.pk))
+        self.assertIsNone(process_upload(job.pk))
+        self.assertEqual(ProductCommentImage.objects.count(), 1)
+
+    def test_stale_processing_jobs_are_requeued(self):
+        job = self.upload(jpeg_upload((10, 10)))
+        CommentImageUpload.objects.filter(pk=job.pk).update(
+            status="processing", updated_at=timezone.now() - timedelta(minutes=30)
+        )
+        output = io.StringIO()
+        call_command("process_comment_uploads", stdout=output)
+        self.assertIn("1 ta upload", output.getvalue())
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+
+    @override_settings(COMMENT_IMAGE_MAX_UPLOAD_SIZE=1024)
+    def test_oversized_upload_is_rejected_before_queueing(self):
+        response = self.client.post(
+            "/api/product-comment-images/",
+            {"comment": self.comment.pk, "image": SimpleUploadedFile("katta.jpg", b"x" * 2048)},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CommentImageUpload.objects.exists())
+
+
+# ------------------ CATALOG IMPORT ------------------
+class CatalogImportTests(TempMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.images_root = Path(self.media_root) / "imports"
+        self.images_root.mkdir()
+
+    def run_import(self, import_format, text, **kwargs):
+        return import_catalog(import_format, io.StringIO(text), images_root=self.images_root, **kwargs)
+
+    def test_csv_creates_products_and_categories(self):
+        report = self.run_import("csv", (
+            "title,description,category,price,discount_price,count\n"
+            "Olma sharbati,1 litr,Ichimliklar,12.50,,10\n"
+            "Nok sharbati,,Ichimliklar,11,9.90,3\n"
+            "Choy,,Ichimliklar,narx yo'q,,1\n"
+        ))
+        self.assertEqual((report.rows, report.created, report.updated, report.failed), (3, 2, 0, 1))
+        self.assertEqual(report.categories_created, 1)
+        self.assertEqual(report.errors, [{"line": 4, "error": "price: son bo'lishi kerak."}])
+
+        category = Category.objects.get(title="Ichimliklar")
+        product = Product.objects.get(title="Nok sharbati")
+        self.assertEqual(
+            (product.category_id, product.price, product.discount_price, product.count, product.slug),
+            (category.pk, Decimal("11.00"), Decimal("9.90"), 3, "nok-sharbati"),
+        )
+
+    def test_upsert_by_title_keeps_fields_missing_from_the_file(self):
+        self.run_import("csv", "title,description,price,count\nOlma,Qizil olma,5,7\n")
+        product = Product.objects.get(title="Olma")
+
+        report = self.run_import("jsonl", '{"title": "Olma", "price": "6.5"}\n')
+        self.assertEqual((report.created, report.updated), (0, 1))
+        updated = Product.objects.get(title="Olma")
+        self.assertEqual((updated.pk, updated.slug), (product.pk, product.slug))
+        self.assertEqual((updated.price, updated.description, updated.count), (Decimal("6.50"), "Qizil olma", 7))
+
+    def test_jsonl_row_errors_do_not_stop_the_import(self):
+        report = self.run_import("jsonl", "\n".join([
+            '{"title": "Olma 7", "price": 1}',
+            "{yaroqsiz",
+            '["obyekt", "emas"]',
+            '{"title": "", "price": 1}',
+            '{"title": "Olma 7!", "price": 1, "count": -2}',
+            '{"title": "Olma 7?", "price": 1}',
+        ]))
+        self.assertEqual((report.created, report.failed), (2, 4))
+        self.assertEqual([error["line"] for error in report.errors], [2, 3, 4, 5])
+        # bir xil slug ga tushadigan title lar Product.save() dagi kabi raqamlanadi
+        self.assertEqual(
+            sorted(Product.objects.values_list("slug", flat=True)), ["olma-7", "olma-7-1"]
+        )
+
+    def test_images_are_resolved_against_the_import_root(self):
+        Image.new("RGB", (8, 8), "red").save(self.images_root / "olma.png")
+        with mock.patch("core.catalog_import.schedule_derivatives"), self.captureOnCommitCallbacks(execute=True):
+            report = self.run_import("csv", (
+                "title,price,image,images\n"
+                "Olma,1,olma.png,olma.png\n"
+                "Nok,1,yoq.png,\n"
+                "Anor,1,../../etc/passwd,\n"
+            ))
+        self.assertEqual((report.created, report.failed, report.images_added), (1, 2, 1))
+        product = Product.objects.get(title="Olma")
+        self.assertEqual(product.images.get().image.name, product.image.name)
+        self.assertEqual(StoredFile.objects.get(name=product.image.name).refcount, 2)
+
+    def test_csv_without_title_column_is_rejected(self):
+        with self.assertRaises(CatalogImportError):
+            self.run_import("csv", "name,price\nOlma,1\n")
+        with self.assertRaises(CatalogImportError):
+            self.run_import("xml", "")
+
+    def test_import_endpoint_is_staff_only(self):
+        upload = SimpleUploadedFile("katalog.csv", b"title,price\nOlma,1\n", content_type="text/csv")
+        client = APIClient()
+        self.assertEqual(client.post("/api/products/import/", {"file": upload}).status_code, 401)
+
+        client.force_authenticate(User.objects.create(phone_number="+998900000001", is_staff=True))
+        upload.seek(0)
+        response = client.post("/api/products/import/", {"file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 0))
+
+
+# ------------------ EXPORTS ------------------
+class OrderExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        olma = Product.objects.create(title="Olma", description="", price=5)
+        nok = Product.objects.create(title="Nok", description="", price=7)
+        cls.orders = []
+        for status, day, lines in [
+            ("paid", "2025-01-10", [(olma, 2), (nok, 1)]),
+            ("shipped", "2025-01-31", []),
+            ("canceled", "2025-02-01", [(nok, 3)]),
+        ]:
+            order = Order.objects.create(phone_number="+998900000000", total=0, status=status)
+            for product, quantity in lines:
+                OrderItem.objects.create(
+                    order=order, product=product, quantity=quantity,
+                    unit_price=product.price, total_price=product.price * quantity,
+                )
+            # created_at auto_now_add - sanani keyin qo'yamiz
+            Order.objects.filter(pk=order.pk).update(created_at=parse_bound(day) + timedelta(hours=12))
+            cls.orders.append(order)
+
+    def export(self, export_format="csv", chunk_size=CHUNK_SIZE, **filters):
+        return "".join(iter_export(export_format, export_queryset(**filters), chunk_size))
+
+    def test_csv_has_one_row_per_item(self):
+        rows = list(csv.DictReader(io.StringIO(self.export())))
+        self.assertEqual(
+            [(int(row["order_id"]), row["item_product_title"], row["item_quantity"]) for row in rows],
+            [
+                (self.orders[0].pk, "Olma", "2"), (self.orders[0].pk, "Nok", "1"),
+                (self.orders[1].pk, "", ""),
+                (self.orders[2].pk, "Nok", "3"),
+            ],
+        )
+
+    def test_jsonl_filters_by_date_and_status(self):
+        lines = self.export(
+            "jsonl", created_from=parse_bound("2025-01-10"), created_to=parse_bound("2025-01-31", end=True),
+            statuses=parse_statuses("paid,shipped"),
+        ).splitlines()
+        orders = [json.loads(line) for line in lines]
+        self.assertEqual([order["id"] for order in orders], [self.orders[0].pk, self.orders[1].pk])
+        self.assertEqual([item["product_title"] for item in orders[0]["items"]], ["Olma", "Nok"])
+        self.assertEqual(orders[0]["items"][0]["total_price"], "10.00")
+
+    def test_queries_depend_on_chunks_not_orders(self):
+        # har bir chunk: orders + items (product bilan)
+        with self.assertNumQueries(2):
+            self.export(chunk_size=10)
+
+    def test_invalid_filters_raise_export_error(self):
+        for value in ("2024-02-30", "kecha", "2025-13-01T00:00"):
+            with self.subTest(value=value), self.assertRaises(ExportError):
+                parse_bound(value)
+        with self.assertRaises(ExportError):
+            parse_statuses("paid,yo'qolgan")
+        with self.assertRaises(ExportError):
+            iter_export("xml", export_queryset())
+
+    def test_endpoint_streams_for_staff_only(self):
+        client = APIClient()
+        self.assertEqual(client.get("/api/orders/export/").status_code, 401)
+        client.force_authenticate(User.objects.create(phone_number="+998900000002"))
+        self.assertEqual(client.get("/api/orders/export/").status_code, 403)
+
+        client.force_authenticate(User.objects.create(phone_number="+998900000003", is_staff=True))
+        response = client.get("/api/orders/export/", {"output": "jsonl", "status": "canceled"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual([json.loads(line)["id"] for line in body.splitlines()], [self.orders[2].pk])
+        self.assertEqual(client.get("/api/orders/export/", {"created_from": "2024-02-30"}).status_code, 400)
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "orders.csv"
+            call_command("export_orders", "--status", "paid", "-o", str(path))
+            rows = list(csv.DictReader(path.open(encoding="utf-8")))
+        self.assertEqual({int(row["order_id"]) for row in rows}, {self.orders[0].pk})
+        self.assertEqual(len(rows), 2)
 
-# Create your tests here.
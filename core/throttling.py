@@ -0,0 +1,193 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+REJECTED_KEY = "throttle-rejected:{}:{}"
+FLUSH_LOCK_KEY = "throttle-rejected-flush"
+FLUSH_INTERVAL = 60
+STAT_PERIOD = 60 * 60
+
+
+# ------------------ REJECTED METRIC ------------------
+def _period(now):
+    return int(now // STAT_PERIOD)
+
+
+def record_rejection(scope, now):
+    key = REJECTED_KEY.format(scope, _period(now))
+    cache.add(key, 0, timeout=STAT_PERIOD * 3)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=STAT_PERIOD * 3)
+    # hujum paytida ham DB ga daqiqasiga ko'pi bilan bitta flush
+    if cache.add(FLUSH_LOCK_KEY, 1, timeout=FLUSH_INTERVAL):
+        flush_rejections(now)
+
+
+def flush_rejections(now):
+    """Joriy va oldingi soat hisoblagichlarini ThrottleStat ga yozadi (idempotent)."""
+    from .models import ThrottleStat
+
+    periods = (_period(now) - 1, _period(now))
+    keys = {
+        REJECTED_KEY.format(scope, period): (scope, period)
+        for scope in api_settings.DEFAULT_THROTTLE_RATES
+        for period in periods
+    }
+    counts = cache.get_many(keys)
+    stats = [
+        ThrottleStat(
+            scope=keys[key][0],
+            period_start=datetime.fromtimestamp(keys[key][1] * STAT_PERIOD, tz=dt_timezone.utc),
+            rejected=count,
+        )
+        for key, count in counts.items() if count
+    ]
+    if stats:
+        ThrottleStat.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=["scope", "period_start"],
+            update_fields=["rejected", "updated_at"],
+        )
+    return len(stats)
+
+
+# ------------------ THROTTLES ------------------
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Sliding window counter: cache da har bir oyna uchun bitta integer
+    (SimpleRateThrottle dagi har bir request timestamp ro'yxati o'rniga).
+    Joriy son = oldingi oyna * (oynaning qolgan ulushi) + joriy oyna.
+    Rad etilgan requestlar hisoblagichni oshirmaydi (oshirilgan hit decr bilan qaytariladi).
+
+    Rate view.throttle_scope + "_" + scope_suffix bo'yicha
+    REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] dan olinadi, masalan "login_phone".
+
+    View AllScopesThrottleMixin ishlatsa boshqa scope rad etgan requestning
+    hiti undo_hit() bilan qaytariladi.
+    """
+    scope_suffix = None
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def __init__(self):
+        # rate view ma'lum bo'lgandan keyin (allow_request da) aniqlanadi
+        self.wait_seconds = None
+        self.hit_key = None
+
+    def get_ident_value(self, request):
+        raise NotImplementedError
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_value(request)
+        if not ident:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    def allow_request(self, request, view):
+        base_scope = getattr(view, "throttle_scope", None)
+        if not base_scope:
+            return True
+        self.scope = f"{base_scope}_{self.scope_suffix}"
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window = int(now // self.duration)
+        elapsed = now - window * self.duration
+        current_key = f"{self.key}:{window}"
+        # hit avval atomik yoziladi (add + incr), keyin tekshiriladi: parallel kelgan
+        # requestlar bir xil eski sonni o'qib hammasi o'tib ketmaydi
+        current = self.increment(current_key)
+        previous = self.cache.get(f"{self.key}:{window - 1}", 0)
+
+        remaining_share = (self.duration - elapsed) / self.duration
+        if previous * remaining_share + current > self.num_requests:
+            self.decrement(current_key)
+            # shu requestgacha bo'lgan son
+            current -= 1
+            if current >= self.num_requests or not previous:
+                self.wait_seconds = self.duration - elapsed
+            else:
+                # oldingi oyna ulushi limit ostiga tushguncha
+                self.wait_seconds = max(
+                    self.duration - elapsed - (self.num_requests - current) * self.duration / previous, 1
+                )
+            record_rejection(self.scope, now)
+            return False
+
+        self.hit_key = current_key
+        return True
+
+    def increment(self, key):
+        self.cache.add(key, 0, timeout=self.duration * 2)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # add va incr orasida muddati tugagan
+            self.cache.set(key, 1, timeout=self.duration * 2)
+            return 1
+
+    def decrement(self, key):
+        try:
+            self.cache.decr(key)
+        except ValueError:
+            pass
+
+    def undo_hit(self):
+        """Boshqa throttle rad etgan request uchun yozilgan hitni qaytaradi."""
+        if self.hit_key is None:
+            return
+        self.decrement(self.hit_key)
+        self.hit_key = None
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class PhoneRateThrottle(SlidingWindowThrottle):
+    """request.data dagi phone_number bo'yicha (bitta raqamga kod so'rash / taxmin qilish)."""
+    scope_suffix = "phone"
+
+    def get_ident_value(self, request):
+        phone = request.data.get("phone_number") if hasattr(request.data, "get") else None
+        if not isinstance(phone, str):
+            return None
+        # "+998 90 ..." va "99890..." bitta hisoblagich
+        return "".join(char for char in phone if char.isdigit()) or None
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    """Klient IP bo'yicha (ko'p raqam bilan hujum qiluvchi bitta manba)."""
+    scope_suffix = "ip"
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+
+# ------------------ VIEW MIXIN ------------------
+class AllScopesThrottleMixin:
+    """
+    Request faqat barcha throttlelar ruxsat bersa hisoblanadi. DRF standartida
+    har bir throttle alohida hisoblaydi: IP limiti rad etgan request ham phone
+    hisoblagichini oshirardi va bitta IP boshqa odamning raqamini bloklab qo'ya olardi.
+    Shuning uchun hammasi tekshiriladi va rad etilsa ruxsat berganlarning hiti qaytariladi.
+    """
+
+    def check_throttles(self, request):
+        throttles = self.get_throttles()
+        rejected = [throttle for throttle in throttles if not throttle.allow_request(request, self)]
+        if not rejected:
+            return
+        for throttle in throttles:
+            if throttle not in rejected and hasattr(throttle, "undo_hit"):
+                throttle.undo_hit()
+        durations = [throttle.wait() for throttle in rejected]
+        self.throttled(request, max((d for d in durations if d is not None), default=None))
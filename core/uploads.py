@@ -0,0 +1,137 @@
+import io
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import CommentImageUpload, ProductCommentImage
+
+logger = logging.getLogger(__name__)
+
+
+class UploadRejected(Exception):
+    pass
+
+
+def max_dimension():
+    return getattr(settings, "COMMENT_IMAGE_MAX_DIMENSION", 2048)
+
+
+def process_image(file):
+    """
+    Validatsiya + EXIF tozalash + re-encode + resize. EXIF (GPS va h.k.) yangi
+    rasmga ko'chirilmaydi, orientatsiya esa pikselga qo'llanadi.
+    """
+    try:
+        image = Image.open(file)
+        image.verify()
+        file.seek(0)
+        image = Image.open(file)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError) as exc:
+        raise UploadRejected(f"Yaroqsiz rasm: {exc}")
+
+    has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    image.thumbnail((max_dimension(), max_dimension()), Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    if has_alpha:
+        image.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue(), "png"
+    image.save(buffer, format="JPEG", quality=85, optimize=True)
+    return buffer.getvalue(), "jpg"
+
+
+def claim(job_id):
+    # bir nechta worker bir xil jobni olmasligi uchun shartli UPDATE
+    return CommentImageUpload.objects.filter(pk=job_id, status="pending").update(
+        status="processing", attempts=F("attempts") + 1, updated_at=timezone.now()
+    )
+
+
+def process_upload(job_id):
+    if not claim(job_id):
+        return None
+    job = CommentImageUpload.objects.get(pk=job_id)
+
+    try:
+        with job.staged_file.open("rb") as staged:
+            content, extension = process_image(staged)
+    except UploadRejected as exc:
+        job.status = "failed"
+        job.error = str(exc)
+        job.save(update_fields=["status", "error", "updated_at"])
+        job.staged_file.delete(save=False)
+        return job
+    except Exception as exc:
+        # vaqtinchalik xato (storage va h.k.) - keyingi sweep da qayta urinish mumkin
+        logger.exception("Comment image upload #%s qayta ishlanmadi", job_id)
+        job.status = "pending" if job.attempts < 3 else "failed"
+        job.error = str(exc)
+        job.save(update_fields=["status", "error", "updated_at"])
+        return job
+
+    stem = posixpath.splitext(posixpath.basename(job.staged_file.name))[0]
+    with transaction.atomic():
+        image = ProductCommentImage(comment_id=job.comment_id)
+        image.image.save(f"{stem}.{extension}", ContentFile(content), save=False)
+        image.save()
+        job.result = image
+        job.status = "done"
+        job.error = ""
+        job.save(update_fields=["result", "status", "error", "updated_at"])
+    job.staged_file.delete(save=False)
+    return job
+
+
+# ------------------ WORKER POOL ------------------
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "UPLOAD_WORKERS", 2),
+            thread_name_prefix="comment-uploads",
+        )
+    return _executor
+
+
+def _run(job_id):
+    close_old_connections()
+    try:
+        process_upload(job_id)
+    except Exception:
+        logger.exception("Comment image upload #%s worker xatosi", job_id)
+    finally:
+        close_old_connections()
+
+
+def enqueue(job):
+    return get_executor().submit(_run, job.pk)
+
+
+def process_pending(limit=100, stale_after=None):
+    """
+    Navbatdagi (va `stale_after` dan uzoq processing da qolib ketgan) joblarni
+    qayta ishlaydi - process restart bo'lganda yo'qolgan joblar uchun.
+    """
+    if stale_after is not None:
+        CommentImageUpload.objects.filter(
+            status="processing", updated_at__lt=timezone.now() - stale_after
+        ).update(status="pending")
+    job_ids = list(
+        CommentImageUpload.objects.filter(status="pending").order_by("created_at").values_list("pk", flat=True)[:limit]
+    )
+    for job_id in job_ids:
+        process_upload(job_id)
+    return len(job_ids)
@@ -3,9 +3,10 @@ from rest_framework.routers import DefaultRouter
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework.permissions import AllowAny
+from . import async_views
 from .views import (
     CategoryViewSet, ProductViewSet, ProductImageViewSet,
-    ProductCommentViewSet, ProductCommentImageViewSet,
+    ProductCommentViewSet, ProductCommentImageViewSet, CommentImageUploadViewSet,
     CartViewSet, CartItemViewSet,
     OrderViewSet, OrderItemViewSet,
     RegisterAPIView, LoginAPIView
@@ -18,6 +19,7 @@ router.register(r'products', ProductViewSet)
 router.register(r'product-images', ProductImageViewSet)
 router.register(r'product-comments', ProductCommentViewSet)
 router.register(r'product-comment-images', ProductCommentImageViewSet)
+router.register(r'comment-image-uploads', CommentImageUploadViewSet)
 router.register(r'carts', CartViewSet)
 router.register(r'cart-items', CartItemViewSet)
 router.register(r'orders', OrderViewSet)
@@ -40,6 +42,11 @@ urlpatterns = [
     path('api/', include(router.urls)),
     path('api/register/', RegisterAPIView.as_view(), name='register'),
     path('api/login/', LoginAPIView.as_view(), name='login'),
+    # ASGI uchun async hot read endpointlar
+    path('api/async/products/', async_views.product_list, name='async-product-list'),
+    path('api/async/products/<int:pk>/', async_views.product_detail, name='async-product-detail'),
+    path('api/async/categories/', async_views.category_list, name='async-category-list'),
+    path('api/async/carts/<int:pk>/', async_views.cart_detail, name='async-cart-detail'),
     path('api/swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='swagger-ui'),
     path('api/redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='redoc-ui'),
 ]
@@ -0,0 +1,98 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from .models import Verification
+
+
+class VerificationRepository:
+    """
+    Bot uchun Verification ga async kirish. Django async ORM metodlari (aget,
+    afirst, asave) ichida sync_to_async(thread_sensitive=True) - ya'ni butun
+    process uchun bitta thread, shuning uchun parallel update lar bir-birini
+    kutadi. Bu yerda har bir so'rov o'z (cheklangan) thread poolida bajariladi:
+    har bir thread o'z persistent DB ulanishiga ega va ular parallel ishlaydi.
+    Har bir metod database ga bitta so'rov yuboradi (happy path da).
+    """
+
+    def __init__(self, max_workers=None):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or getattr(settings, "BOT_DB_THREADS", 10),
+            thread_name_prefix="bot-db",
+        )
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._call, func, args)
+
+    @staticmethod
+    def _call(func, args):
+        try:
+            return func(*args)
+        except DatabaseError:
+            # uzilib qolgan ulanish keyingi so'rovda qayta ochiladi
+            connection.close()
+            raise
+
+    # ------------------ QUERIES ------------------
+    @staticmethod
+    def _attach_chat(token, chat_id):
+        try:
+            token = uuid.UUID(token)
+        except ValueError:
+            return "invalid"
+        updated = Verification.objects.filter(
+            token=token, is_used=False, expires_at__gte=timezone.now()
+        ).update(chat_id=chat_id)
+        if updated:
+            return "ok"
+        # faqat xato holatda: eskirgan/ishlatilgan yoki umuman yo'q
+        return "expired" if Verification.objects.filter(token=token).exists() else "invalid"
+
+    @staticmethod
+    def _pending_for_chat(chat_id):
+        return (
+            Verification.objects.filter(chat_id=chat_id, is_used=False)
+            .only("id", "phone_number", "code")
+            .order_by("-created_at")
+            .first()
+        )
+
+    async def attach_chat(self, token, chat_id):
+        """/start <token>: chat_id ni bog'laydi. "ok" | "expired" | "invalid" qaytaradi."""
+        return await self._run(self._attach_chat, token, chat_id)
+
+    async def pending_for_chat(self, chat_id):
+        return await self._run(self._pending_for_chat, chat_id)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+# ------------------ PURGE ------------------
+def purge_expired(batch_size=1000, now=None, pause=0):
+    """
+    Muddati o'tgan (ishlatilgan yoki ishlatilmagan) verificationlarni batch-batch
+    o'chiradi. Ishlatilgan kod ham muddati tugaguncha (10 daqiqa) qoladi, keyin
+    shu yerda o'chadi. Har bir batch alohida qisqa tranzaksiya - write lock uzoq
+    ushlanmaydi; `pause` soniya batchlar orasida boshqa yozuvchilarga navbat beradi.
+    """
+    now = now or timezone.now()
+    total = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                Verification.objects.filter(expires_at__lt=now)
+                .order_by("expires_at")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                return total
+            Verification.objects.filter(id__in=ids).delete()
+        total += len(ids)
+        if pause:
+            time.sleep(pause)
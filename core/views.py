@@ -1,37 +1,123 @@
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework import filters
-from drf_yasg.utils import swagger_auto_schema
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from drf_yasg.utils import no_body, swagger_auto_schema
 from drf_yasg import openapi
 from .models import (
-    Category, Product, ProductImage, ProductComment, ProductCommentImage,
+    Category, Product, ProductImage, ProductComment, ProductCommentImage, CommentImageUpload,
     Cart, CartItem, Order, OrderItem, Verification, User
 )
 from .serializers import (
-    CategorySerializer, ProductSerializer, ProductImageSerializer,
-    ProductCommentSerializer, ProductCommentImageSerializer,
-    CartSerializer, CartItemSerializer, OrderSerializer, OrderItemSerializer,
+    CategorySerializer, ProductSerializer, ProductSummarySerializer, ProductAvailabilitySerializer, ProductImageSerializer,
+    ProductCommentSerializer, ProductCommentImageSerializer, CommentImageUploadSerializer,
+    CartSerializer, CartItemSerializer, CartItemOperationSerializer, CheckoutSerializer, OrderSerializer, OrderItemSerializer,
     RegisterSerializer, LoginSerializer
 )
+from .cache import VersionedCacheMixin
+from .catalog_import import IMPORT_FORMATS, CatalogImportError, import_catalog
+from .checkout import CheckoutError, checkout_cart
+from .exports import EXPORT_FORMATS, ExportError, export_queryset, iter_export, parse_bound, parse_statuses
+from .reservations import ReservationError, release_excess, reserve_cart
+from .routers import use_primary
+from .uploads import enqueue
+from .search import ProductSearchFilter
+from .suggest import suggest_index
+from .throttling import AllScopesThrottleMixin, IPRateThrottle, PhoneRateThrottle
+from .pagination import (
+    CategoryPagination, ProductPagination, ProductCommentPagination, OrderPagination
+)
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from datetime import timedelta
+import io
 import random
 
+AVAILABILITY_MAX_IDS = 100
+
+
+# ------------------ SPARSE FIELDSETS ------------------
+class SparseFieldsetMixin:
+    """
+    Serializer ?fields=/?expand= bo'yicha qaytaradigan maydonlarga qarab
+    SQL ni ham toraytiradi: faqat kerakli ustunlar only() bilan o'qiladi.
+    """
+    # pagination/ordering kalitlari (always_loaded_fields va ordering_fields) doim
+    # yuklanadi, aks holda cursor har sahifada deferred maydon uchun query qiladi
+    always_loaded_fields = ("id",)
+    # model ustuni bo'lmagan serializer maydonlari uchun kerakli ustunlar
+    field_dependencies = {}
+
+    def get_rendered_field_names(self):
+        serializer_class = self.get_serializer_class()
+        available = serializer_class().fields.keys()
+        selected = serializer_class.selected_field_names(self.request, available)
+        return set(available) if selected is None else selected
+
+    def narrow_queryset(self, queryset, field_names):
+        concrete = {field.name for field in queryset.model._meta.concrete_fields}
+        ordering_fields = getattr(self, "ordering_fields", None) or ()
+        columns = set(field_names) | set(ordering_fields)
+        for name in field_names:
+            columns.update(self.field_dependencies.get(name, ()))
+        columns &= concrete
+        return queryset.only(*columns, *self.always_loaded_fields)
+
+
 # ------------------ CRUD ------------------
-class CategoryViewSet(ModelViewSet):
+class CategoryViewSet(SparseFieldsetMixin, VersionedCacheMixin, ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    pagination_class = CategoryPagination
+    always_loaded_fields = ("id", "title")
+    cache_dependencies = ("core.Category",)
+
+    def get_queryset(self):
+        return self.narrow_queryset(super().get_queryset(), self.get_rendered_field_names())
+
+
+def comment_images_prefetch():
+    return Prefetch(
+        "images",
+        queryset=ProductCommentImage.objects.only("id", "comment_id", "image", "image_variants"),
+    )
 
 
-class ProductViewSet(ModelViewSet):
+def product_comments_prefetch():
+    return Prefetch(
+        "comments",
+        queryset=ProductComment.objects.only(
+            "id", "product_id", "user", "rating", "comment_text"
+        ).prefetch_related(comment_images_prefetch()),
+    )
+
+
+def product_images_prefetch():
+    return Prefetch(
+        "images",
+        queryset=ProductImage.objects.only("id", "product_id", "image", "image_variants"),
+    )
+
+
+class ProductViewSet(SparseFieldsetMixin, VersionedCacheMixin, ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'description']
-    ordering_fields = ['price', 'created_at']
+    pagination_class = ProductPagination
+    always_loaded_fields = ("id", "title")
+    # Category o'chirilganda Product.category SET_NULL bilan (signalsiz) o'zgaradi
+    cache_dependencies = (
+        "core.Product", "core.Category", "core.ProductImage", "core.ProductComment", "core.ProductCommentImage"
+    )
+    filter_backends = [ProductSearchFilter, filters.OrderingFilter]
+    ordering_fields = ['price', 'created_at', 'rating_avg', 'rating_count']
     
     @swagger_auto_schema(
         manual_parameters=[
@@ -44,32 +130,152 @@ class ProductViewSet(ModelViewSet):
             openapi.Parameter(
                 'search',
                 openapi.IN_QUERY,
-                description="Nomi yoki tavsifida qidirish",
+                description="Nomi yoki tavsifida full-text qidirish (prefix, relevance bo'yicha tartiblanadi)",
                 type=openapi.TYPE_STRING
             ),
             openapi.Parameter(
                 'ordering',
                 openapi.IN_QUERY,
-                description="Tartiblash (price, -price, created_at, -created_at)",
+                description="Tartiblash (price, -price, created_at, -created_at, rating_avg, -rating_avg, rating_count, -rating_count)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'min_rating',
+                openapi.IN_QUERY,
+                description="O'rtacha reytingi shu qiymatdan past bo'lmagan mahsulotlar",
+                type=openapi.TYPE_NUMBER
+            ),
+            openapi.Parameter(
+                'fields',
+                openapi.IN_QUERY,
+                description="Faqat shu maydonlarni qaytarish (masalan: title,slug,price)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'expand',
+                openapi.IN_QUERY,
+                description="Nested relationlarni qo'shish (images, comments)",
                 type=openapi.TYPE_STRING
             )
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
-    
+
+    @swagger_auto_schema(
+        operation_description="Katalog grid uchun yengil ro'yxat (title, slug, price, discount_price, image)"
+    )
+    @action(detail=False, methods=["get"])
+    def summary(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Mavjud stock (count - reserved_count). Reservationlar bilan tez o'zgaradi, shuning uchun "
+            "cache qilinmaydi va primary dan o'qiladi"
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'ids', openapi.IN_QUERY, required=True, type=openapi.TYPE_STRING,
+                description=f"Vergul bilan ajratilgan product ID lari (max {AVAILABILITY_MAX_IDS})"
+            ),
+        ]
+    )
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def availability(self, request, *args, **kwargs):
+        ids = request.query_params.get("ids", "").split(",")
+        if not all(pk.strip().isdigit() for pk in ids) or len(ids) > AVAILABILITY_MAX_IDS:
+            raise ValidationError({"ids": f"{AVAILABILITY_MAX_IDS} tagacha butun sonlar vergul bilan."})
+        with use_primary():
+            products = list(Product.objects.filter(pk__in=ids).only("id", "count", "reserved_count").order_by("pk"))
+        return Response({"results": ProductAvailabilitySerializer(products, many=True).data})
+
+    @swagger_auto_schema(
+        operation_description="As-you-type takliflar: Product va Category nomlari bo'yicha prefix qidiruv",
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, description="Qidiruv prefiksi", type=openapi.TYPE_STRING),
+            openapi.Parameter('limit', openapi.IN_QUERY, description="Natijalar soni (max 50)", type=openapi.TYPE_INTEGER),
+        ]
+    )
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def suggest(self, request, *args, **kwargs):
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+        except ValueError:
+            raise ValidationError({"limit": "Butun son bo'lishi kerak."})
+        results = suggest_index.suggest(request.query_params.get("q", ""), limit=limit)
+        return Response({"results": results})
+
+    @swagger_auto_schema(
+        operation_description=(
+            "CSV yoki JSONL fayldan mahsulotlarni title bo'yicha upsert qilish (faqat staff). "
+            "Ustunlar: title, price, description, category, discount_price, count, image, images; "
+            "rasm yo'llari CATALOG_IMPORT_ROOT ga nisbatan. Katta fayllar uchun: manage.py import_catalog"
+        ),
+        manual_parameters=[
+            openapi.Parameter("file", openapi.IN_FORM, type=openapi.TYPE_FILE, required=True),
+            openapi.Parameter(
+                "input", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=[*IMPORT_FORMATS],
+                description="Berilmasa fayl kengaytmasidan"
+            ),
+        ],
+        request_body=no_body,
+        responses={200: "Import report (rows, created, updated, failed, errors, rows_per_second)", 400: "Noto'g'ri fayl"}
+    )
+    @action(
+        detail=False, methods=["post"], url_path="import", permission_classes=[IsAdminUser],
+        parser_classes=[MultiPartParser],
+    )
+    def import_products(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"detail": "file yuborilmadi."}, status=status.HTTP_400_BAD_REQUEST)
+        import_format = request.query_params.get("input") or upload.name.rsplit(".", 1)[-1].lower()
+        try:
+            report = import_catalog(import_format, io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline=""))
+        except (CatalogImportError, UnicodeDecodeError) as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report.as_dict())
+
+    @property
+    def ordering(self):
+        # ?search= bo'lsa va ?ordering= berilmasa natijalar relevance bo'yicha
+        if self.request is not None and self.request.query_params.get("search", "").strip():
+            return ("search_rank",)
+        return None
+
+    def get_serializer_class(self):
+        if self.action == "summary":
+            return ProductSummarySerializer
+        return super().get_serializer_class()
+
     def get_queryset(self):
-        queryset = super().get_queryset()
+        # images, comments va comment rasmlari bitta rejalangan fetch bilan:
+        # sahifadagi mahsulotlar soni qancha bo'lmasin, 4 ta query.
+        # ?fields=/?expand= bilan so'ralmagan ustun va relationlar o'qilmaydi
+        rendered = self.get_rendered_field_names()
+        queryset = self.narrow_queryset(super().get_queryset(), rendered)
+        prefetches = {
+            "images": product_images_prefetch,
+            "comments": product_comments_prefetch,
+        }
+        queryset = queryset.prefetch_related(
+            *(prefetch() for name, prefetch in prefetches.items() if name in rendered)
+        )
+        min_rating = self.request.query_params.get('min_rating')
+        if min_rating:
+            try:
+                queryset = queryset.filter(rating_avg__gte=float(min_rating))
+            except ValueError:
+                raise ValidationError({"min_rating": "Raqam bo'lishi kerak."})
+
         category_id = self.request.query_params.get('category_id')
-        
         if category_id:
-            # Agar sizda Product va Category o'rtasida bog'lanish bo'lsa
-            # queryset = queryset.filter(category_id=category_id)
-            # Lekin hozircha category_id parametri qabul qilinadi, ammo filtr qilinmaydi
-            # Chunki Product modelida category maydoni yo'q
-            # Bu yerda siz o'zingizning mantiqingizni qo'llashingiz kerak
-            pass
-        
+            # (category, price) va (category, created_at) indexlari bilan qo'llab-quvvatlanadi
+            if not category_id.isdigit():
+                raise ValidationError({"category_id": "Butun son bo'lishi kerak."})
+            queryset = queryset.filter(category_id=category_id)
+
         return queryset
 
 
@@ -79,32 +285,184 @@ class ProductImageViewSet(ModelViewSet):
 
 
 class ProductCommentViewSet(ModelViewSet):
-    queryset = ProductComment.objects.all()
+    queryset = ProductComment.objects.prefetch_related(comment_images_prefetch())
     serializer_class = ProductCommentSerializer
+    pagination_class = ProductCommentPagination
 
 
 class ProductCommentImageViewSet(ModelViewSet):
     queryset = ProductCommentImage.objects.all()
     serializer_class = ProductCommentImageSerializer
 
+    @swagger_auto_schema(
+        operation_description="Rasm staging ga saqlanadi va darhol pending status qaytadi; "
+                              "holatini /api/comment-image-uploads/{id}/ dan kuzating",
+        request_body=CommentImageUploadSerializer,
+        responses={202: CommentImageUploadSerializer}
+    )
+    def create(self, request, *args, **kwargs):
+        serializer = CommentImageUploadSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            job = serializer.save()
+            transaction.on_commit(lambda: enqueue(job))
+        return Response(
+            CommentImageUploadSerializer(job, context=self.get_serializer_context()).data,
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class CommentImageUploadViewSet(ReadOnlyModelViewSet):
+    queryset = CommentImageUpload.objects.select_related("result")
+    serializer_class = CommentImageUploadSerializer
+
 # ------------------ CART ------------------
+def cart_items_prefetch():
+    return Prefetch(
+        "items",
+        queryset=CartItem.objects.select_related("product").only(
+            "id", "cart_id", "product_id", "quantity", "added_at", "reserved_quantity", "reserved_until",
+            "product__id", "product__title", "product__slug", "product__price", "product__discount_price",
+        ),
+    )
+
+
 class CartViewSet(ModelViewSet):
-    queryset = Cart.objects.all()
+    # totals SQL aggregate sifatida, itemlar product bilan bitta prefetch da: list/retrieve 2 ta query
+    queryset = Cart.objects.with_totals().prefetch_related(cart_items_prefetch())
     serializer_class = CartSerializer
+    # items/reserve/checkout pk ni to'g'ridan-to'g'ri filterga beradi: raqam bo'lmasa 500 emas, 404
+    lookup_value_regex = r"[0-9]+"
+
+    @swagger_auto_schema(
+        operation_description="Cart itemlarini bitta so'rovda sinxronlash: [{product, quantity}], quantity=0 - o'chirish",
+        request_body=CartItemOperationSerializer(many=True),
+        responses={200: CartSerializer, 400: "Noto'g'ri ma'lumot yoki cart faol emas"}
+    )
+    @action(detail=True, methods=["post"], url_path="items")
+    def bulk_items(self, request, pk=None):
+        serializer = CartItemOperationSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        # bir xil product takrorlansa oxirgisi hisoblanadi
+        quantities = {op["product"]: op["quantity"] for op in serializer.validated_data}
+
+        with transaction.atomic():
+            if not Cart.objects.filter(pk=pk, is_active=True).update(updated_at=timezone.now()):
+                return Response({"detail": "Faol cart topilmadi."}, status=status.HTTP_400_BAD_REQUEST)
+
+            upserts = [
+                CartItem(cart_id=pk, product_id=product_id, quantity=quantity)
+                for product_id, quantity in quantities.items() if quantity > 0
+            ]
+            if upserts:
+                CartItem.objects.bulk_create(
+                    upserts,
+                    update_conflicts=True,
+                    unique_fields=["cart", "product"],
+                    update_fields=["quantity"],
+                )
+            removed = [product_id for product_id, quantity in quantities.items() if quantity == 0]
+            if removed:
+                CartItem.objects.filter(cart_id=pk, product_id__in=removed).delete()
+            # kamaytirilgan itemlarning ortiqcha reservationi TTL/checkout ni kutmasdan bo'shatiladi
+            release_excess(pk)
+
+        cart = self.get_queryset().get(pk=pk)
+        return Response(self.get_serializer(cart).data)
+
+    @swagger_auto_schema(
+        operation_description="Cart itemlari uchun stockni vaqtincha band qilish (STOCK_RESERVATION_MINUTES)",
+        request_body=no_body,
+        responses={200: CartSerializer, 400: "Cart faol emas yoki stock yetarli emas"}
+    )
+    @action(detail=True, methods=["post"])
+    def reserve(self, request, pk=None):
+        try:
+            reserve_cart(pk)
+        except ReservationError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        cart = self.get_queryset().get(pk=pk)
+        return Response(self.get_serializer(cart).data)
+
+    @swagger_auto_schema(
+        operation_description="Cartni buyurtmaga aylantirish: stock band qilinadi, total server tomonda hisoblanadi",
+        request_body=CheckoutSerializer,
+        responses={201: OrderSerializer, 400: "Cart bo'sh, faol emas yoki stock yetarli emas"}
+    )
+    @action(detail=True, methods=["post"])
+    def checkout(self, request, pk=None):
+        serializer = CheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            order = checkout_cart(
+                pk,
+                user=request.user if request.user.is_authenticated else None,
+                **serializer.validated_data,
+            )
+        except CheckoutError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        order = Order.objects.prefetch_related(
+            Prefetch("items", queryset=OrderItem.objects.select_related("product"))
+        ).get(pk=order.pk)
+        return Response(OrderSerializer(order, context=self.get_serializer_context()).data, status=status.HTTP_201_CREATED)
 
 
 class CartItemViewSet(ModelViewSet):
-    queryset = CartItem.objects.all()
+    queryset = CartItem.objects.select_related("product")
     serializer_class = CartItemSerializer
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            item = serializer.save()
+            release_excess(item.cart_id)
+
 # ------------------ ORDER ------------------
 class OrderViewSet(ModelViewSet):
-    queryset = Order.objects.all()
+    queryset = Order.objects.prefetch_related(
+        Prefetch("items", queryset=OrderItem.objects.select_related("product"))
+    )
     serializer_class = OrderSerializer
+    pagination_class = OrderPagination
+    # buyurtmalar faqat /api/carts/{id}/checkout/ orqali yaratiladi
+    http_method_names = ["get", "put", "patch", "delete", "head", "options"]
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Buyurtmalar va itemlarini stream qilib eksport qilish (moliya uchun, faqat staff). "
+            "output=csv (har bir item bitta qator) yoki jsonl (har bir buyurtma bitta qator)"
+        ),
+        manual_parameters=[
+            openapi.Parameter("output", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(EXPORT_FORMATS)),
+            openapi.Parameter("created_from", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="YYYY-MM-DD yoki ISO datetime"),
+            openapi.Parameter("created_to", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="YYYY-MM-DD yoki ISO datetime"),
+            openapi.Parameter("status", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Vergul bilan: paid,shipped"),
+        ],
+        responses={200: "CSV yoki JSONL stream", 400: "Noto'g'ri filter"}
+    )
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
+    def export(self, request):
+        export_format = request.query_params.get("output", "csv")
+        try:
+            queryset = export_queryset(
+                created_from=parse_bound(request.query_params.get("created_from")),
+                created_to=parse_bound(request.query_params.get("created_to"), end=True),
+                statuses=parse_statuses(request.query_params.get("status")),
+            )
+            rows = iter_export(export_format, queryset)
+        except ExportError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        content_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+        response = StreamingHttpResponse(rows, content_type=f"{content_type}; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="orders-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"'
+        return response
 
 
 class OrderItemViewSet(ModelViewSet):
-    queryset = OrderItem.objects.all()
+    queryset = OrderItem.objects.select_related("product")
     serializer_class = OrderItemSerializer
 
 # ------------------ AUTH ------------------
@@ -112,7 +470,10 @@ def generate_code():
     return f"{random.randint(0, 999999):06d}"
 
 
-class RegisterAPIView(APIView):
+class RegisterAPIView(AllScopesThrottleMixin, APIView):
+    throttle_classes = [PhoneRateThrottle, IPRateThrottle]
+    throttle_scope = "register"
+
     @swagger_auto_schema(
         operation_description="Telefon raqamni ro'yxatdan o'tkazish va telegram deep link olish",
         request_body=RegisterSerializer,
@@ -150,7 +511,10 @@ class RegisterAPIView(APIView):
         return Response({"deep_link": deep_link}, status=status.HTTP_201_CREATED)
 
 
-class LoginAPIView(APIView):
+class LoginAPIView(AllScopesThrottleMixin, APIView):
+    throttle_classes = [PhoneRateThrottle, IPRateThrottle]
+    throttle_scope = "login"
+
     @swagger_auto_schema(
         operation_description="SMS code orqali login qilish va JWT token olish",
         request_body=LoginSerializer,
@@ -183,7 +547,7 @@ class LoginAPIView(APIView):
             return Response({"detail": "Invalid or expired code"}, status=status.HTTP_400_BAD_REQUEST)
 
         verification.is_used = True
-        verification.save()
+        verification.save(update_fields=["is_used"])
 
         user, _ = User.objects.get_or_create(phone_number=phone)
 